@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from count_cube import dimension_labels, encode_codes
+from filter_spec import FilterSpec
+
+
+@dataclass(frozen=True)
+class AggregateBundle:
+    """Counts of every configured aggregation over one filter selection.
+
+    counts maps an aggregation name to a dense array with one axis per
+    dimension, sized to that dimension's labels; missing values are not counted.
+    """
+    spec: FilterSpec
+    dimensions: Dict[str, List[str]]
+    labels: Dict[str, pd.Index]
+    counts: Dict[str, np.ndarray]
+
+    def series(self, name: str) -> pd.Series:
+        """Get a one-dimensional aggregation indexed by its labels."""
+        column, = self.dimensions[name]
+        return pd.Series(self.counts[name], index=self.labels[column].rename(column))
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """Get a two-dimensional aggregation with the first dimension as index."""
+        rows, columns = self.dimensions[name]
+        return pd.DataFrame(self.counts[name],
+                            index=self.labels[rows].rename(rows),
+                            columns=self.labels[columns].rename(columns))
+
+
+class SelectionAggregator:
+    def __init__(self, df: pd.DataFrame, aggregations: Dict[str, List[str]]):
+        """Encode every column used by the aggregations once, as compact integer codes."""
+        self.aggregations = {name: list(dimensions) for name, dimensions in aggregations.items()}
+        self.labels: Dict[str, pd.Index] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for dimensions in self.aggregations.values():
+            for column in dimensions:
+                if column not in self.codes:
+                    labels = dimension_labels(df[column])
+                    size = len(labels) + 1
+                    self.labels[column] = labels
+                    self.codes[column] = encode_codes(df[column], labels).astype(np.min_scalar_type(size))
+
+    def shape(self, name: str) -> List[int]:
+        """Get the size of each dimension of an aggregation, including the slot for missing values."""
+        return [len(self.labels[column]) + 1 for column in self.aggregations[name]]
+
+    def keys(self, name: str, rows: np.ndarray, gathered: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """Get the combined mixed-radix key of each row for an aggregation.
+
+        gathered maps a column to its codes at rows; columns missing from it
+        are gathered and added, so aggregations over the same rows share them.
+        """
+        if gathered is None:
+            gathered = {}
+        keys = np.zeros(len(rows), dtype=np.int64)
+        for column, radix in zip(self.aggregations[name], self.shape(name)):
+            if column not in gathered:
+                gathered[column] = self.codes[column][rows]
+            keys = keys * radix + gathered[column]
+        return keys
+
+    def flat_counts(self, rows: np.ndarray, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Count the selected rows per combined key for the named aggregations (all by default) in one pass.
+
+        Each needed column's codes are gathered for the selection once and
+        shared, then every aggregation is a single bincount over its key.
+        """
+        names = list(self.aggregations if names is None else names)
+        gathered = {}
+        return {
+            name: np.bincount(self.keys(name, rows, gathered), minlength=int(np.prod(self.shape(name))))
+            for name in names
+        }
+
+    def trim(self, name: str, flat: np.ndarray) -> np.ndarray:
+        """Reshape per-key counts of an aggregation to one axis per dimension, dropping the missing slots."""
+        shape = self.shape(name)
+        return flat.reshape(shape)[tuple(slice(0, radix - 1) for radix in shape)]
+
+    def count(self, rows: np.ndarray, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Count the selected rows for the named aggregations (all by default) in one pass."""
+        return {name: self.trim(name, flat) for name, flat in self.flat_counts(rows, names).items()}
+
+    def bundle(self, spec: FilterSpec, counts: Dict[str, np.ndarray]) -> AggregateBundle:
+        """Wrap computed counts for a spec together with their dimensions and labels."""
+        return AggregateBundle(spec, self.aggregations, self.labels, counts)
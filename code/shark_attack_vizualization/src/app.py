@@ -3,10 +3,14 @@ from dash import html, dcc
 from dash.dependencies import Input, Output, State, ALL
 from dash.exceptions import PreventUpdate
 from data import DataManager
+from filter_spec import FilterSpec
 from visualizations import DashboardVisualizer
-from config import LAYOUT_SETTINGS, STYLE_SETTINGS, STATE_NAME_MAPPING, MAP_SETTINGS
+from config import LAYOUT_SETTINGS, STYLE_SETTINGS, STATE_NAME_MAPPING, REVERSE_STATE_MAPPING, MAP_SETTINGS, DATA_PATHS
+from flask import send_from_directory
 import pandas as pd
 import json
+import os
+import uuid
 
 GRAPH_CATEGORIES = {
     'all': 'All Graphs',
@@ -23,18 +27,52 @@ CATEGORY_GRAPHS = {
     'demographics': ['activity-distribution', 'age-distribution', 'provocation-distribution', 'population-pyramid']
 }
 
+# Chart graphs in the order of the update_graphs and visibility callback outputs
+GRAPH_IDS = [
+    'attacks-by-state', 'activity-distribution', 'provocation-distribution',
+    'shark-species', 'shark-streamgraph', 'age-distribution', 'population-pyramid',
+    'monthly-distribution', 'day-distribution', 'hourly-distribution'
+]
+
 data_manager = DataManager()
 visualizer = DashboardVisualizer(data_manager)
 
+GRAPH_BUILDERS = {
+    'attacks-by-state': visualizer.create_attacks_by_state,
+    'activity-distribution': visualizer.create_activity_distribution,
+    'provocation-distribution': visualizer.create_provocation_distribution,
+    'shark-species': visualizer.create_shark_species,
+    'shark-streamgraph': visualizer.create_shark_streamgraph,
+    'age-distribution': visualizer.create_age_distribution,
+    'population-pyramid': visualizer.create_population_pyramid,
+    'monthly-distribution': visualizer.create_monthly_distribution,
+    'day-distribution': visualizer.create_day_distribution,
+    'hourly-distribution': visualizer.create_hourly_distribution
+}
+
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 
-app.layout = html.Div([
+
+# Simplified state outlines referenced by URL from the map; names carry a content
+# hash, so browsers can keep them without revalidating
+@app.server.route(MAP_SETTINGS['geojson_url_prefix'] + '<path:name>')
+def serve_geojson(name):
+    return send_from_directory(os.path.abspath(DATA_PATHS['geojson_asset_dir']), name,
+                               mimetype='application/geo+json',
+                               max_age=MAP_SETTINGS['geojson_max_age'])
+
+
+page_layout = html.Div([
     dcc.Store(id='selected-states', data=[]),
     dcc.Store(id='camera-position', data={
         'center': {"lat": -28.2744, "lon": 128.7751},
         'zoom': 3.3
     }),
     dcc.Store(id='selected-activities', data=[], storage_type='memory'),
+    # Category picked with the category buttons, and the filter state each chart
+    # was last drawn for; hidden charts are only redrawn once they are shown
+    dcc.Store(id='visible-category', data='all'),
+    dcc.Store(id='rendered-filters', data={}),
     
     html.Div([
         html.Div([
@@ -476,6 +514,14 @@ app.layout = html.Div([
     })
 ])
 
+
+# Every page load gets its own session id, which keys its crossfilter state
+def serve_layout():
+    return html.Div([dcc.Store(id='session-id', data=uuid.uuid4().hex)] + page_layout.children)
+
+
+app.layout = serve_layout
+
 # Callback for filter panel toggle
 @app.callback(
     [Output('filter-panel', 'style')],
@@ -561,6 +607,9 @@ def update_map_and_camera(selected_injuries, map_click_data, state_bar_click_dat
     if not selected_states:
         selected_states = []
 
+    previous_zoom = camera_position['zoom']
+    show_heatmap = 'heatmap' in (heatmap_toggle or [])
+
     # Handle recenter button click
     if triggered_id == 'recenter-button':
         camera_position = {
@@ -573,9 +622,22 @@ def update_map_and_camera(selected_injuries, map_click_data, state_bar_click_dat
             camera_position['center'] = relayout_data['mapbox.center']
         if 'mapbox.zoom' in relayout_data:
             camera_position['zoom'] = relayout_data['mapbox.zoom']
+        # Corners of the visible area as reported by the browser, if it sent them
+        if 'mapbox._derived' in relayout_data:
+            camera_position['bounds'] = relayout_data['mapbox._derived']['coordinates']
+        elif 'mapbox.center' in relayout_data or 'mapbox.zoom' in relayout_data:
+            camera_position.pop('bounds', None)
+
+    # Pan, zoom and recenter only move the camera. Unless the new zoom needs other
+    # clusters, heatmap bins or outlines, or the view leaves the area whose points
+    # were sent, patch the camera instead of rebuilding.
+    if triggered_id == 'recenter-button' or triggered_prop == 'relayoutData':
+        if visualizer.can_patch_camera(previous_zoom, camera_position, show_heatmap):
+            return (dash.no_update, visualizer.map_camera_patch(camera_position, show_heatmap),
+                    camera_position, dash.no_update, dash.no_update)
 
     # Handle state bar click
-    elif triggered_id == 'attacks-by-state' and state_bar_click_data:
+    if triggered_id == 'attacks-by-state' and state_bar_click_data:
         clicked_state = state_bar_click_data['points'][0]['customdata']
         if clicked_state in selected_states:
             selected_states.remove(clicked_state)
@@ -607,15 +669,14 @@ def update_map_and_camera(selected_injuries, map_click_data, state_bar_click_dat
         elif 'customdata' in clicked_point:
             clicked_state = clicked_point['customdata'][0]
 
-        if clicked_state:
+        # Incident points carry hover fields in customdata, only state hitboxes carry a state name
+        if clicked_state in REVERSE_STATE_MAPPING:
             if clicked_state in selected_states:
                 selected_states.remove(clicked_state)
             else:
                 selected_states.append(clicked_state)
 
-    show_heatmap = 'heatmap' in (heatmap_toggle or [])
-
-    return selected_states, visualizer.create_map(
+    map_figure = visualizer.create_map(
         selected_injuries=selected_injuries,
         selected_states=selected_states,
         camera_position=camera_position,
@@ -628,20 +689,18 @@ def update_map_and_camera(selected_injuries, map_click_data, state_bar_click_dat
         selected_activities=selected_activities,
         selected_time_periods=selected_time_periods,
         selected_sharks=selected_sharks
-    ), camera_position, selected_activities, activity_checklist
+    )
+    if visualizer.map_culls_to_viewport(camera_position['zoom'], show_heatmap):
+        camera_position['loaded_bounds'] = list(visualizer.map_points_bounds(camera_position))
+    else:
+        camera_position.pop('loaded_bounds', None)
+
+    return selected_states, map_figure, camera_position, selected_activities, activity_checklist
 
 # Callback for graph updates
 @app.callback(
-    [Output('attacks-by-state', 'figure'),
-     Output('activity-distribution', 'figure'),
-     Output('provocation-distribution', 'figure'),
-     Output('shark-species', 'figure'),
-     Output('shark-streamgraph', 'figure'),
-     Output('age-distribution', 'figure'),
-     Output('population-pyramid', 'figure'),
-     Output('monthly-distribution', 'figure'),
-     Output('day-distribution', 'figure'),
-     Output('hourly-distribution', 'figure')],
+    [Output(graph_id, 'figure') for graph_id in GRAPH_IDS] +
+    [Output('rendered-filters', 'data')],
     [Input('injury-checklist', 'value'),
      Input('selected-states', 'data'),
      Input('selected-activities', 'data'),
@@ -651,135 +710,51 @@ def update_map_and_camera(selected_injuries, map_click_data, state_bar_click_dat
      Input('gender-checklist', 'value'),
      Input('month-checklist', 'value'),
      Input('time-period-checklist', 'value'),
-     Input('shark-checklist', 'value')]
+     Input('shark-checklist', 'value'),
+     Input('visible-category', 'data')],
+    [State('rendered-filters', 'data'),
+     State('session-id', 'data')]
 )
 def update_graphs(selected_injuries, selected_states, selected_activities,
                  age_range, year_range, selected_days,
                  selected_genders, selected_months,
-                 selected_time_periods, selected_sharks):
-    
-    return (
-        visualizer.create_attacks_by_state(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_activity_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_provocation_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_shark_species(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_shark_streamgraph(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_age_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_population_pyramid(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_monthly_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_day_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        ),
-        visualizer.create_hourly_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            selected_activities=selected_activities,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+                 selected_time_periods, selected_sharks,
+                 visible_category, rendered_filters, session_id):
+    filters = dict(
+        selected_injuries=selected_injuries,
+        selected_states=selected_states,
+        selected_activities=selected_activities,
+        age_range=age_range,
+        year_range=year_range,
+        selected_days=selected_days,
+        selected_genders=selected_genders,
+        selected_months=selected_months,
+        selected_time_periods=selected_time_periods,
+        selected_sharks=selected_sharks
     )
+    # Normalise the filter once and hand the same spec to every chart; row
+    # selections resolved for it are shared through the selection cache
+    spec = FilterSpec.from_filters(**filters)
+    filter_key = repr(spec)
+
+    # Only charts on screen are drawn. A hidden chart keeps its old figure and is
+    # redrawn when its category is shown again, if the filters changed meanwhile.
+    visible_graphs = CATEGORY_GRAPHS.get(visible_category, GRAPH_IDS)
+    rendered_filters = dict(rendered_filters or {})
+    stale_graphs = [graph_id for graph_id in visible_graphs if rendered_filters.get(graph_id) != filter_key]
+    if stale_graphs:
+        # Count the chart series through this session's crossfilter, which only
+        # visits the rows whose filters changed since its last update; the
+        # charts then share the bundle cached for the spec
+        data_manager.aggregate(spec, session=session_id)
+    figures = []
+    for graph_id in GRAPH_IDS:
+        if graph_id in stale_graphs:
+            figures.append(GRAPH_BUILDERS[graph_id](spec))
+            rendered_filters[graph_id] = filter_key
+        else:
+            figures.append(dash.no_update)
+    return figures + [rendered_filters]
 
 # Reset filters
 @app.callback(
@@ -805,35 +780,31 @@ def reset_filters(n_clicks):
 
 # Handle graph visibility
 @app.callback(
-    [Output({'type': 'graph-container', 'index': graph_id}, 'style')
-     for graph_id in ['attacks-by-state', 'activity-distribution', 'provocation-distribution',
-                      'shark-species', 'shark-streamgraph', 'age-distribution', 'population-pyramid',
-                      'monthly-distribution', 'day-distribution', 'hourly-distribution']],
+    [Output({'type': 'graph-container', 'index': graph_id}, 'style') for graph_id in GRAPH_IDS] +
+    [Output('visible-category', 'data')],
     [Input({'type': 'category-button', 'index': ALL}, 'n_clicks')],
     [State({'type': 'category-button', 'index': ALL}, 'id')]
 )
 def update_graph_visibility(n_clicks, button_ids):
     ctx = dash.callback_context
     if not ctx.triggered or not any(n_clicks):
-        return [{'marginBottom': '40px'} for _ in range(10)]
+        return [{'marginBottom': '40px'} for _ in GRAPH_IDS] + ['all']
 
     triggered_id = ctx.triggered[0]['prop_id']
     if not triggered_id:
-        return [{'marginBottom': '40px'} for _ in range(10)]
+        return [{'marginBottom': '40px'} for _ in GRAPH_IDS] + ['all']
 
     clicked_category = json.loads(triggered_id.split('.')[0])['index']
 
     if clicked_category == 'all':
-        return [{'marginBottom': '40px'} for _ in range(10)]
+        return [{'marginBottom': '40px'} for _ in GRAPH_IDS] + ['all']
 
     visible_graphs = CATEGORY_GRAPHS[clicked_category]
 
     return [
         {'marginBottom': '40px'} if graph_id in visible_graphs else {'display': 'none'}
-        for graph_id in ['attacks-by-state', 'activity-distribution', 'provocation-distribution',
-                         'shark-species', 'shark-streamgraph', 'age-distribution', 'population-pyramid',
-                         'monthly-distribution', 'day-distribution', 'hourly-distribution']
-    ]
+        for graph_id in GRAPH_IDS
+    ] + [clicked_category]
 
 @app.callback(
     [Output({'type': 'category-button', 'index': ALL}, 'style')],
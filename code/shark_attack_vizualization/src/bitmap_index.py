@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Hashable, Iterable, List, Optional
+
+
+class BitmapIndex:
+    def __init__(self, df: pd.DataFrame, dimensions: List[str]):
+        """Build one packed bit vector per distinct value of each dimension column, with its row count."""
+        self.n_rows = len(df)
+        self.bitmaps: Dict[str, Dict[Hashable, np.ndarray]] = {}
+        self.value_counts: Dict[str, Dict[Hashable, int]] = {}
+        for column in dimensions:
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()
+                labels = values.cat.categories
+            else:
+                codes, labels = pd.factorize(values)
+            self.bitmaps[column] = {
+                label: np.packbits(codes == code)
+                for code, label in enumerate(labels)
+            }
+            counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+            self.value_counts[column] = dict(zip(labels, counts.tolist()))
+
+    def estimate(self, column: str, values: Iterable) -> int:
+        """Count the rows matching any of the given values from the load-time counts."""
+        counts = self.value_counts[column]
+        return sum(counts.get(value, 0) for value in values)
+
+    def empty(self) -> np.ndarray:
+        """Get a packed bit vector with no rows set."""
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def match_any(self, column: str, values: Iterable) -> np.ndarray:
+        """OR together the bitmaps of the given values within one dimension."""
+        result = self.empty()
+        bitmaps = self.bitmaps[column]
+        for value in values:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                np.bitwise_or(result, bitmap, out=result)
+        return result
+
+    def match_all(self, predicates: Dict[str, Iterable]) -> Optional[np.ndarray]:
+        """AND the per-dimension matches together, or None if there are no predicates."""
+        result = None
+        for column, values in predicates.items():
+            matched = self.match_any(column, values)
+            if result is None:
+                result = matched
+            else:
+                np.bitwise_and(result, matched, out=result)
+        return result
+
+    def contains(self, packed: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Test the bits of the given row positions without unpacking the whole vector."""
+        shifts = (7 - (rows & 7)).astype(np.uint8)
+        return ((packed[rows >> 3] >> shifts) & 1).view(bool)
+
+    def to_mask(self, packed: np.ndarray) -> np.ndarray:
+        """Unpack a bit vector into a boolean row mask."""
+        return np.unpackbits(packed, count=self.n_rows).view(bool)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+from count_cube import dimension_labels, encode_codes
+
+# Width in pixels of the whole Web Mercator world at zoom 0
+WORLD_PX = 256
+
+
+def mercator_pixels(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Project coordinates to Web Mercator pixel positions at zoom 0, as an (n, 2) array of x, y."""
+    x = (lon + 180.0) / 360.0 * WORLD_PX
+    sin_lat = np.sin(np.radians(np.clip(lat, -85.0511, 85.0511)))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * WORLD_PX
+    return np.column_stack([x, y])
+
+
+class ClusterIndex:
+    def __init__(self, df: pd.DataFrame, max_zoom: int, cell_px: int, summary_columns: List[str]):
+        """Assign every incident to a screen-space grid cell for each integer zoom below max_zoom.
+
+        Cells are cell_px wide at their zoom, so each cell splits into four at
+        the next level and the levels form a quadtree over the map. Only the
+        finest level is projected; every coarser one halves its cell indexes.
+        A level stores the cell of each row as x * columns + y, and rows
+        without coordinates get cell -1. summary_columns are reported per
+        cluster as their most frequent value.
+        """
+        self.max_zoom = max_zoom
+        self.latitude = df['Latitude'].to_numpy(dtype=float)
+        self.longitude = df['Longitude'].to_numpy(dtype=float)
+        valid = ~(np.isnan(self.latitude) | np.isnan(self.longitude))
+        pixels = mercator_pixels(self.latitude[valid], self.longitude[valid])
+        # floor(floor(p * 2**z / c) / 2**k) == floor(p * 2**(z - k) / c), so the
+        # coarser cells are exact shifts of the finest ones
+        finest = np.floor(pixels * (2 ** (max_zoom - 1)) / cell_px).astype(np.int64)
+
+        self.levels: List[np.ndarray] = []
+        for zoom in range(max_zoom):
+            cells = finest >> (max_zoom - 1 - zoom)
+            columns = int(np.ceil(WORLD_PX * 2 ** zoom / cell_px)) + 1
+            dtype = np.int32 if columns ** 2 < np.iinfo(np.int32).max else np.int64
+            level = np.full(len(df), -1, dtype=dtype)
+            level[valid] = cells[:, 0] * columns + cells[:, 1]
+            self.levels.append(level)
+
+        self.labels: Dict[str, pd.Index] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for column in summary_columns:
+            self.labels[column] = dimension_labels(df[column])
+            self.codes[column] = encode_codes(df[column], self.labels[column])
+
+    def level_for(self, zoom: float) -> int:
+        """Get the precomputed level used for a map zoom."""
+        return int(np.clip(np.floor(zoom), 0, self.max_zoom - 1))
+
+    def clusters(self, rows: np.ndarray, zoom: float) -> pd.DataFrame:
+        """Group the given rows into the cells of the level for a map zoom.
+
+        Returns one row per non-empty cell with the mean position, the number
+        of incidents and the dominant value of every summary column.
+        """
+        level = self.levels[self.level_for(zoom)]
+        codes = level[rows]
+        rows = rows[codes >= 0]
+        _, inverse = np.unique(codes[codes >= 0], return_inverse=True)
+        n = int(inverse.max()) + 1 if len(inverse) else 0
+
+        counts = np.bincount(inverse, minlength=n)
+        frame = {
+            'Latitude': np.bincount(inverse, weights=self.latitude[rows], minlength=n) / np.maximum(counts, 1),
+            'Longitude': np.bincount(inverse, weights=self.longitude[rows], minlength=n) / np.maximum(counts, 1),
+            'Count': counts
+        }
+        for column, labels in self.labels.items():
+            size = len(labels) + 1
+            per_value = np.bincount(inverse * size + self.codes[column][rows],
+                                    minlength=n * size).reshape(n, size)[:, :-1]
+            dominant = labels.to_numpy(dtype=object)[per_value.argmax(axis=1)] if len(labels) else np.full(n, None)
+            frame[column] = np.where(per_value.max(axis=1, initial=0) > 0, dominant, None)
+        return pd.DataFrame(frame)
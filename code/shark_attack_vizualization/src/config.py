@@ -25,13 +25,44 @@ REVERSE_STATE_MAPPING = {v: k for k, v in STATE_NAME_MAPPING.items()}
 MAP_SETTINGS = {
     'default_center': {"lat": -28.2744, "lon": 128.7751},
     'default_zoom': 3.3,
-    'style': 'carto-darkmatter'
+    'style': 'carto-darkmatter',
+    # Below this zoom incidents are drawn as grid clusters; from it on as raw points
+    'cluster_max_zoom': 7,
+    # Width of a cluster cell in screen pixels at its zoom level
+    'cluster_cell_px': 60,
+    # Columns whose most frequent value is reported for each cluster
+    'cluster_summary_columns': ['State', 'SharkName'],
+    # Heatmap bins: zoom levels precomputed and bin width in screen pixels; the
+    # heatmap sends one weighted point per bin instead of every incident
+    'density_max_zoom': 12,
+    'density_cell_px': 8,
+    # Simplified state outlines served to the browser, one file per zoom band:
+    # simplification tolerance in degrees and decimals kept per coordinate
+    'geojson_bands': [
+        {'min_zoom': 0, 'tolerance': 0.05, 'precision': 2},
+        {'min_zoom': 5, 'tolerance': 0.01, 'precision': 3},
+        {'min_zoom': 8, 'tolerance': 0.002, 'precision': 4}
+    ],
+    # URL the simplified outlines are served under; the files never change
+    # once written, so browsers may cache them for good
+    'geojson_url_prefix': '/geojson/',
+    'geojson_max_age': 31536000,
+    # Raw points are only sent for the visible area grown by this fraction per
+    # side; the browser size assumed when it has not reported the corners yet
+    'viewport_margin': 0.25,
+    'viewport_px': [1920, 1080],
+    # Above this many visible points, a spatially even sample over a grid of
+    # at most sample_grid x sample_grid cells is sent instead
+    'point_budget': 5000,
+    'sample_grid': 32
 }
 
 CHART_SETTINGS = {
     'background_color': '#121212',
     'font_color': 'white',
     'grid_color': '#333333',
+    # Streamgraph layout: 'symmetric' centres the stack, 'wiggle' minimises layer slopes
+    'streamgraph_baseline': 'symmetric',
     'accent_color': '#688ae8',
     'hover_bgcolor': '#121212',
     'hover_bordercolor': '#36def7'
@@ -56,7 +87,74 @@ DATA_SETTINGS = {
         'Activity', 'Injury', 'Gender', 'Age'
     ],
     'top_n_activities': 8,
-    'top_n_species': 5
+    'top_n_species': 5,
+    'top_n_stream_species': 6,
+    'use_snapshot': True,
+    # Upper age (inclusive) of each AgeGroup bucket; older ages fall in an open-ended
+    # last group and missing ages in 'Unknown'
+    'age_group_edges': [12, 17, 24, 34, 44, 54],
+    # Includes external territories such as Cocos (Keeling) and Lord Howe Island
+    'coordinate_bounds': {
+        'lat': (-55.0, -9.0),
+        'lon': (96.0, 168.0)
+    },
+    # Fixed category order for the categorical columns; values found in the
+    # data but not listed here are appended in sorted order.
+    'categories': {
+        'State': list(STATE_NAME_MAPPING),
+        'Gender': ['female', 'male', 'unknown'],
+        'Injury': ['fatal', 'injured', 'uninjured'],
+        'Provocation': ['provoked', 'unprovoked'],
+        'TimePeriod': ['morning', 'afternoon', 'evening', 'night'],
+        'DayOfWeek': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+        'Activity': [],
+        'SharkName': []
+    },
+    # Columns filtered by value lists, indexed with one bitmap per value
+    'bitmap_dimensions': [
+        'State', 'Gender', 'Activity', 'SharkName', 'Injury', 'TimePeriod', 'DayOfWeek', 'Month'
+    ],
+    # Columns filtered by [low, high] sliders, indexed by a presorted permutation
+    'range_dimensions': ['Age', 'Month', 'Day', 'Year'],
+    # Low-cardinality dimensions pre-aggregated into the count cube, so its size is
+    # bounded by their label counts rather than by the number of incidents. The age
+    # slider is answered through AgeGroup while it splits no age group; filters on
+    # any other column (Activity, SharkName, Day) fall back to counting the selected rows
+    'cube_dimensions': [
+        'State', 'Year', 'Month', 'DayOfWeek', 'AgeGroup', 'Gender', 'Provocation', 'Injury', 'TimePeriod'
+    ],
+    # The cube is only used while it has at most this many cells per incident;
+    # a cube nearly as large as the table costs as much to sum as the rows to scan
+    'cube_max_fill': 0.25,
+    # Series computed together for every filter selection, by name, as the
+    # columns each one is counted over
+    'aggregations': {
+        'state': ['State'],
+        'activity': ['Activity'],
+        'species': ['SharkName'],
+        'day': ['DayOfWeek'],
+        'month': ['Month'],
+        'age_group': ['AgeGroup'],
+        'hour': ['Hour'],
+        'activity_provocation': ['Activity', 'Provocation'],
+        'year_species': ['Year', 'SharkName'],
+        'gender_age_provocation': ['Gender', 'AgeGroup', 'Provocation']
+    },
+    # Number of resolved filter selections, and of aggregation bundles, kept in the LRU caches
+    'selection_cache_size': 128,
+    # Dashboard sessions whose crossfilter is kept; each holds one byte per incident
+    'crossfilter_sessions': 32,
+    # Finished chart figures kept per process, and in the figure cache directory
+    # shared by all workers (0 turns the shared tier off)
+    'figure_cache_size': 256,
+    'figure_cache_disk_entries': 2000,
+    # Narrow dtypes for numeric columns; Day and Age may be missing so they stay float
+    'numeric_dtypes': {
+        'Year': 'int16',
+        'Month': 'int8',
+        'Day': 'float32',
+        'Age': 'float32'
+    }
 }
 
 STYLE_SETTINGS = {
@@ -65,16 +163,26 @@ STYLE_SETTINGS = {
     'scrollbar_hover_color': '#2ba7b9'
 }
 
-HOVER_TEXT_TEMPLATE = """
-<b>Year:</b> {year}<br>
-<b>Shark Species:</b> {shark}<br>
-<b>Activity:</b> {activity}<br>
-<b>Injury:</b> {injury}<br>
-<b>Gender:</b> {gender}<br>
-<b>Age:</b> {age}
-"""
+# Map points carry their hover fields as customdata in this order and share
+# one hovertemplate, instead of a pre-rendered HTML string per point.
+HOVER_FIELDS = ['Year', 'SharkName', 'Activity', 'Injury', 'Gender', 'Age', 'IncidentTime', 'TimePeriod']
+
+HOVER_TEMPLATE = (
+    "<b>Year:</b> %{customdata[0]}<br>"
+    "<b>Shark Species:</b> %{customdata[1]}<br>"
+    "<b>Activity:</b> %{customdata[2]}<br>"
+    "<b>Injury:</b> %{customdata[3]}<br>"
+    "<b>Gender:</b> %{customdata[4]}<br>"
+    "<b>Age:</b> %{customdata[5]}<br>"
+    "<b>Time:</b> %{customdata[6]}<br>"
+    "<b>Time Period:</b> %{customdata[7]}"
+    "<extra></extra>"
+)
 
 DATA_PATHS = {
     'csv_file': 'data/cleaned_data.csv',
-    'geojson_file': 'data/states.geojson'
+    'geojson_file': 'data/states.geojson',
+    'snapshot_dir': 'data/snapshot',
+    'geojson_asset_dir': 'data/geojson',
+    'figure_cache_dir': 'data/figure_cache'
 }
\ No newline at end of file
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+
+
+def dimension_labels(values: pd.Series) -> pd.Index:
+    """Get the label list of a dimension: its categories, or its sorted distinct values."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.categories
+    return pd.Index(np.sort(values.dropna().unique()))
+
+
+def encode_codes(values: pd.Series, labels: pd.Index) -> np.ndarray:
+    """Map values to positions in labels, using len(labels) for missing or unknown values."""
+    if isinstance(values.dtype, pd.CategoricalDtype) and values.cat.categories.equals(labels):
+        codes = values.cat.codes.to_numpy().astype(np.int32)
+    else:
+        codes = labels.get_indexer(values).astype(np.int32)
+    codes[codes < 0] = len(labels)
+    return codes
+
+
+class CountCube:
+    def __init__(self, df: pd.DataFrame, dimensions: List[str]):
+        """Pre-aggregate row counts over every observed combination of the dimension columns.
+
+        Each dimension is encoded as integer codes into its label list, with the
+        code len(labels) standing for a missing value. Only combinations present
+        in the data are stored, so the cube is a sparse list of cells.
+        """
+        self.dimensions = list(dimensions)
+        self.labels: Dict[str, pd.Index] = {}
+        self._lookup: Dict[str, Dict] = {}
+        row_codes = []
+        for column in self.dimensions:
+            labels = dimension_labels(df[column])
+            self.labels[column] = labels
+            self._lookup[column] = {label: code for code, label in enumerate(labels.tolist())}
+            row_codes.append(self.encode(column, df[column]))
+
+        radices = [len(self.labels[column]) + 1 for column in self.dimensions]
+        if np.prod(radices, dtype=float) < np.iinfo(np.int64).max:
+            # Mixed-radix key per row, then one hash count over the keys
+            keys = np.zeros(len(df), dtype=np.int64)
+            for codes, radix in zip(row_codes, radices):
+                keys = keys * radix + codes
+            cell_keys = pd.Series(keys).value_counts(sort=False)
+            self.counts = cell_keys.to_numpy(dtype=np.int64)
+            remaining = cell_keys.index.to_numpy(dtype=np.int64)
+            cell_codes = []
+            for radix in reversed(radices):
+                cell_codes.append(remaining % radix)
+                remaining = remaining // radix
+            cell_codes.reverse()
+        else:
+            cells, self.counts = np.unique(np.column_stack(row_codes), axis=0, return_counts=True)
+            cell_codes = list(cells.T)
+
+        self.cell_codes = {
+            column: codes.astype(np.int32) for column, codes in zip(self.dimensions, cell_codes)
+        }
+
+    def encode(self, column: str, values: pd.Series) -> np.ndarray:
+        """Map column values to cube codes, using len(labels) for missing or unknown values."""
+        return encode_codes(values, self.labels[column])
+
+    def allowed_codes(self, column: str, values: Iterable) -> np.ndarray:
+        """Flag the codes of a dimension whose label is one of the given values."""
+        allowed = np.zeros(len(self.labels[column]) + 1, dtype=bool)
+        for value in values:
+            code = self._lookup[column].get(value)
+            if code is not None:
+                allowed[code] = True
+        return allowed
+
+    def codes_in_range(self, column: str, bounds: Tuple) -> np.ndarray:
+        """Flag the codes of a dimension whose label lies in the inclusive [low, high] bounds."""
+        labels = self.labels[column].to_numpy()
+        return np.append((labels >= bounds[0]) & (labels <= bounds[1]), False)
+
+    def count(self, dimensions: List[str], filters: Dict[str, Iterable],
+              ranges: Dict[str, Tuple]) -> np.ndarray:
+        """Sum the cells passing the filters, grouped by the given dimensions.
+
+        filters maps a dimension to its allowed labels and ranges maps a
+        dimension with sortable labels to inclusive [low, high] bounds; missing
+        values never pass either. The result is a dense array with one axis per
+        grouping dimension, sized to its labels (the missing slot is dropped).
+        """
+        mask = np.ones(len(self.counts), dtype=bool)
+        for column, values in filters.items():
+            mask &= self.allowed_codes(column, values)[self.cell_codes[column]]
+        for column, bounds in ranges.items():
+            mask &= self.codes_in_range(column, bounds)[self.cell_codes[column]]
+
+        shape = [len(self.labels[column]) + 1 for column in dimensions]
+        keys = np.zeros(int(mask.sum()), dtype=np.int64)
+        for column, radix in zip(dimensions, shape):
+            keys = keys * radix + self.cell_codes[column][mask]
+        counts = np.bincount(keys, weights=self.counts[mask], minlength=int(np.prod(shape)))
+        counts = counts.astype(np.int64).reshape(shape)
+        return counts[tuple(slice(0, radix - 1) for radix in shape)]
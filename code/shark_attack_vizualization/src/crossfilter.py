@@ -0,0 +1,152 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from aggregation import SelectionAggregator
+from count_cube import dimension_labels, encode_codes
+from filter_spec import RANGE_FILTER_COLUMNS, VALUE_FILTER_COLUMNS, FilterSpec
+from sorted_index import SortedIndex
+
+
+def interval_difference(a: Tuple[int, int], b: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Get the pieces of the half-open interval a that lie outside the half-open interval b."""
+    start, stop = a
+    if b[0] >= b[1]:
+        return [a] if start < stop else []
+    pieces = [(start, min(stop, b[0])), (max(start, b[1]), stop)]
+    return [(low, high) for low, high in pieces if low < high]
+
+
+def accumulate(flat: np.ndarray, keys: np.ndarray, sign: int):
+    """Add sign to flat once per key, with a dense bincount when there are more keys than slots."""
+    if len(keys) > len(flat):
+        flat += sign * np.bincount(keys, minlength=len(flat))
+    elif sign > 0:
+        np.add.at(flat, keys, 1)
+    else:
+        np.subtract.at(flat, keys, 1)
+
+
+class CrossfilterIndex:
+    def __init__(self, df: pd.DataFrame, sorted_indexes: Dict[str, SortedIndex],
+                 aggregator: SelectionAggregator):
+        """Row lists shared by the crossfilters of all sessions.
+
+        Each value-filtered column is encoded once and presorted by code, with
+        the offset where each code starts, so the rows holding one value are a
+        slice of that order. Range filters use the presorted range indexes.
+        The counts of every aggregation over all rows are what a crossfilter
+        without filters starts from.
+        """
+        self.n_rows = len(df)
+        self.sorted_indexes = sorted_indexes
+        self.aggregator = aggregator
+        self.labels: Dict[str, pd.Index] = {}
+        self._lookup: Dict[str, Dict] = {}
+        self.postings: Dict[str, SortedIndex] = {}
+        self.offsets: Dict[str, np.ndarray] = {}
+        for column in set(VALUE_FILTER_COLUMNS.values()):
+            labels = dimension_labels(df[column])
+            self.labels[column] = labels
+            self._lookup[column] = {label: code for code, label in enumerate(labels.tolist())}
+            postings = SortedIndex(encode_codes(df[column], labels))
+            self.postings[column] = postings
+            self.offsets[column] = np.searchsorted(postings.sorted_values,
+                                                   np.arange(len(labels) + 2, dtype=postings.sorted_values.dtype))
+        self.totals = aggregator.flat_counts(np.arange(self.n_rows))
+
+    def allowed_codes(self, column: str, values: Optional[Iterable]) -> np.ndarray:
+        """Flag the codes a value filter lets through; no filter lets every code through, missing included."""
+        if values is None:
+            return np.ones(len(self.labels[column]) + 1, dtype=bool)
+        allowed = np.zeros(len(self.labels[column]) + 1, dtype=bool)
+        for value in values:
+            code = self._lookup[column].get(value)
+            if code is not None:
+                allowed[code] = True
+        return allowed
+
+    def range_slice(self, column: str, bounds: Optional[Tuple]) -> Tuple[int, int]:
+        """Get the slice of a column's sorted order a range filter lets through; no filter lets all rows through."""
+        if bounds is None:
+            return 0, self.n_rows
+        return self.sorted_indexes[column].bounds(bounds[0], bounds[1])
+
+    def changed_rows(self, field: str, old, new) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the rows that start and the rows that stop passing a filter field when it goes from old to new."""
+        if field in VALUE_FILTER_COLUMNS:
+            column = VALUE_FILTER_COLUMNS[field]
+            before, after = self.allowed_codes(column, old), self.allowed_codes(column, new)
+            offsets = self.offsets[column]
+            pieces = {
+                sign: [(offsets[code], offsets[code + 1]) for code in np.flatnonzero(flags)]
+                for sign, flags in ((1, after & ~before), (-1, before & ~after))
+            }
+            order = self.postings[column].order
+        else:
+            column = RANGE_FILTER_COLUMNS[field]
+            before, after = self.range_slice(column, old), self.range_slice(column, new)
+            pieces = {1: interval_difference(after, before), -1: interval_difference(before, after)}
+            order = self.sorted_indexes[column].order
+        passing, failing = (
+            np.concatenate([order[start:stop] for start, stop in pieces[sign]] or [np.empty(0, order.dtype)])
+            for sign in (1, -1)
+        )
+        return passing, failing
+
+    def session(self) -> 'Crossfilter':
+        """Start a crossfilter with no filters applied."""
+        return Crossfilter(self)
+
+
+class Crossfilter:
+    def __init__(self, index: CrossfilterIndex):
+        """Per-session filter state, moved from one spec to the next by visiting only the rows that change.
+
+        Each row keeps the number of filters it currently fails, and every
+        aggregation keeps its counts over the rows failing none. Moving to a
+        new spec visits, per changed filter field, the rows whose membership
+        in that filter flips; rows reaching zero failures enter the counts and
+        rows leaving zero leave them. The work is proportional to those rows,
+        not to the table or the selection. When more rows change than stay
+        selected, as when a first value of a column is picked, the counts are
+        instead recounted over the remaining selection, which is cheaper.
+        """
+        self.index = index
+        self.spec = FilterSpec()
+        self.failing = np.zeros(index.n_rows, dtype=np.uint8)
+        self.flat = {name: counts.copy() for name, counts in index.totals.items()}
+        self.selected = index.n_rows
+        self.rows_visited = 0
+        self._lock = threading.Lock()
+
+    def move_to(self, spec: FilterSpec, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Apply spec as a diff against the current one and get the counts of the named aggregations."""
+        aggregator = self.index.aggregator
+        with self._lock:
+            for field in list(VALUE_FILTER_COLUMNS) + list(RANGE_FILTER_COLUMNS):
+                old, new = getattr(self.spec, field), getattr(spec, field)
+                if old != new:
+                    self._update(*self.index.changed_rows(field, old, new))
+            self.spec = spec
+            names = list(aggregator.aggregations if names is None else names)
+            # Copies, since the counts keep changing with the next spec
+            return {name: aggregator.trim(name, self.flat[name]).copy() for name in names}
+
+    def _update(self, passing: np.ndarray, failing: np.ndarray):
+        """Move the failure counters and aggregation counts for rows that start or stop passing one filter."""
+        self.rows_visited += len(passing) + len(failing)
+        # Rows that stop passing one filter leave the selection if they passed all the others
+        left = failing[self.failing[failing] == 0]
+        self.failing[failing] += 1
+        self.failing[passing] -= 1
+        entered = passing[self.failing[passing] == 0]
+        self.selected += len(entered) - len(left)
+        if len(left) + len(entered) > self.selected:
+            self.flat = self.index.aggregator.flat_counts(np.flatnonzero(self.failing == 0))
+            return
+        for rows, sign in ((left, -1), (entered, 1)):
+            if len(rows):
+                gathered = {}
+                for name, flat in self.flat.items():
+                    accumulate(flat, self.index.aggregator.keys(name, rows, gathered), sign)
@@ -1,41 +1,157 @@
+import numpy as np
 import pandas as pd
 import json
 from shapely.geometry import shape
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from config import (
     DATA_PATHS,
     DATA_SETTINGS,
-    REVERSE_STATE_MAPPING,
-    STATE_NAME_MAPPING
+    MAP_SETTINGS
 )
+from snapshot import dataset_version, load_snapshot, save_snapshot, source_fingerprint
+from bitmap_index import BitmapIndex
+from filter_spec import FilterSpec, SelectionCache, resolve_spec
+from sorted_index import SortedIndex
+from count_cube import CountCube
+from aggregation import AggregateBundle, SelectionAggregator
+from crossfilter import Crossfilter, CrossfilterIndex
+from streamgraph import StreamLayout, stream_layout
+from cluster_index import ClusterIndex
+from geojson_assets import asset_for_zoom, build_geojson_assets
+from viewport import Bounds, in_bounds, stratified_sample
+from query_planner import QueryPlanner
+
+# Sentinel stored in the Hour column when IncidentTime is missing or unparseable
+UNKNOWN_HOUR = -1
+
+# Hour-of-day edges for TimePeriod: [0, 6) night, [6, 12) morning,
+# [12, 18) afternoon, [18, 21) evening, [21, 24) night
+TIME_PERIOD_BINS = [6, 12, 18, 21]
+TIME_PERIOD_LABELS = np.array(['night', 'morning', 'afternoon', 'evening', 'night'], dtype=object)
+
+# AgeGroup label for rows without a recorded age
+UNKNOWN_AGE_GROUP = 'Unknown'
+
+# Settings that shape the derived columns; a snapshot built with other values is rebuilt
+DERIVED_COLUMN_SETTINGS = ['coordinate_bounds', 'categories', 'numeric_dtypes', 'age_group_edges']
+
+
+def age_group_labels(edges: List[int]) -> List[str]:
+    """Label the buckets bounded above (inclusive) by edges, then the open-ended and unknown groups."""
+    lows = [0] + [edge + 1 for edge in edges]
+    labels = [f'{low}-{high}' for low, high in zip(lows, edges)]
+    return labels + [f'{lows[-1]}+', UNKNOWN_AGE_GROUP]
 
 
 class DataManager:
     def __init__(self):
-        """Initialize DataManager with empty data structures."""
+        """Initialize DataManager, reusing the columnar snapshot when it is still valid."""
+        self.load()
+
+    def load(self):
+        """(Re)load the incident data and rebuild everything derived from it.
+
+        dataset_version changes whenever the source files or derived-column
+        settings do, so caches keyed on it drop results of the previous data.
+        """
+        self.geojson_data = self._load_geojson()
+        source_paths = [DATA_PATHS['csv_file'], DATA_PATHS['geojson_file']]
+        settings = {key: DATA_SETTINGS[key] for key in DERIVED_COLUMN_SETTINGS}
+        snapshot = None
+        if DATA_SETTINGS['use_snapshot']:
+            snapshot = load_snapshot(DATA_PATHS['snapshot_dir'], source_paths, settings)
+
+        if snapshot is not None:
+            # The fingerprint stored with a valid snapshot saves hashing the sources
+            self.df, self.state_centroids, fingerprint = snapshot
+        else:
+            self._build_frame()
+            fingerprint = source_fingerprint(source_paths)
+            if DATA_SETTINGS['use_snapshot']:
+                try:
+                    save_snapshot(DATA_PATHS['snapshot_dir'], source_paths, self.df,
+                                  self.state_centroids, settings, fingerprint)
+                except OSError:
+                    # A read-only data directory only costs the next worker a rebuild.
+                    pass
+        self.dataset_version = dataset_version(fingerprint, settings)
+
+        self._build_indexes()
+
+        try:
+            self.geojson_assets = build_geojson_assets(
+                DATA_PATHS['geojson_file'], self.geojson_data,
+                DATA_PATHS['geojson_asset_dir'], MAP_SETTINGS['geojson_bands']
+            )
+        except OSError:
+            # Without the files the map embeds the full GeoJSON in every figure
+            self.geojson_assets = []
+
+    def geojson_source(self, zoom: float):
+        """Get the URL of the simplified state outlines for a zoom, or the full GeoJSON if none were written."""
+        asset = asset_for_zoom(self.geojson_assets, zoom)
+        if asset is None:
+            return self.geojson_data
+        return MAP_SETTINGS['geojson_url_prefix'] + asset['file']
+
+    def _build_indexes(self):
+        """Build the filter indexes over the current frame and start an empty selection cache."""
+        self.bitmap_index = BitmapIndex(self.df, DATA_SETTINGS['bitmap_dimensions'])
+        self.sorted_indexes = {
+            column: SortedIndex(self.df[column].to_numpy())
+            for column in DATA_SETTINGS['range_dimensions']
+        }
+        self.query_planner = QueryPlanner(self.bitmap_index, self.sorted_indexes, {
+            column: self.df[column].to_numpy() for column in DATA_SETTINGS['range_dimensions']
+        })
+        cube = CountCube(self.df, DATA_SETTINGS['cube_dimensions'])
+        self.count_cube = cube if len(cube.counts) <= DATA_SETTINGS['cube_max_fill'] * len(self.df) else None
+        self.age_group_extents = self._age_group_extents()
+        self.cluster_index = ClusterIndex(self.df, MAP_SETTINGS['cluster_max_zoom'],
+                                          MAP_SETTINGS['cluster_cell_px'],
+                                          MAP_SETTINGS['cluster_summary_columns'])
+        self.density_index = ClusterIndex(self.df, MAP_SETTINGS['density_max_zoom'],
+                                          MAP_SETTINGS['density_cell_px'], [])
+        self.aggregator = SelectionAggregator(self.df, DATA_SETTINGS['aggregations'])
+        self.crossfilter_index = CrossfilterIndex(self.df, self.sorted_indexes, self.aggregator)
+        self.crossfilters = SelectionCache(DATA_SETTINGS['crossfilter_sessions'])
+        self.bundle_cache = SelectionCache(DATA_SETTINGS['selection_cache_size'])
+        self.selection_cache = SelectionCache(DATA_SETTINGS['selection_cache_size'])
+        self.stream_cache = SelectionCache(DATA_SETTINGS['selection_cache_size'])
+
+    def _build_frame(self):
+        """Parse the incident CSV and derive all computed columns."""
         self.df = pd.read_csv(DATA_PATHS['csv_file'])
-        self.df['Latitude'] = self.df['Latitude'].apply(self._clean_coordinate)
-        self.df['Longitude'] = self.df['Longitude'].apply(self._clean_coordinate)
+        self._clean_coordinates()
         self.df['Injury'] = self.df['Injury'].str.lower()
-        self.geojson_data = self._load_geojson()
         self.state_centroids = self._calculate_state_centroids()
         self._add_day_of_week()
+        self._add_hour()
         self._add_time_period()
-        self._create_hover_text()
-
-    def _clean_coordinate(self, coord):
-        """Clean coordinate values by removing special characters and converting to float."""
-        if pd.isna(coord):
-            return None
-        try:
-            # Convert to string first
-            coord_str = str(coord)
-            # Remove special characters and keep only numbers, decimal points, and minus signs
-            cleaned = ''.join(c for c in coord_str if c.isdigit() or c in '.-')
-            # Convert to float
-            return float(cleaned)
-        except (ValueError, TypeError):
-            return None
+        self._apply_compact_schema()
+        self._add_age_group()
+
+    def _clean_coordinate_column(self, values: pd.Series) -> pd.Series:
+        """Strip everything but digits, decimal points and minus signs, then convert to float."""
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            # Already parsed by read_csv, nothing to strip
+            return values.astype('float64')
+        cleaned = values.astype(str).str.replace(r'[^0-9.\-]', '', regex=True)
+        cleaned = cleaned.where(values.notna())
+        return pd.to_numeric(cleaned, errors='coerce')
+
+    def _clean_coordinates(self):
+        """Clean Latitude/Longitude and flag points outside the Australian bounds."""
+        self.df['Latitude'] = self._clean_coordinate_column(self.df['Latitude'])
+        self.df['Longitude'] = self._clean_coordinate_column(self.df['Longitude'])
+
+        bounds = DATA_SETTINGS['coordinate_bounds']
+        in_range = (
+            self.df['Latitude'].between(*bounds['lat']) &
+            self.df['Longitude'].between(*bounds['lon'])
+        )
+        has_coords = self.df['Latitude'].notna() & self.df['Longitude'].notna()
+        self.df['CoordinateOutOfRange'] = has_coords & ~in_range
 
     def _load_geojson(self) -> Dict:
         """Load GeoJSON data for Australian states."""
@@ -64,44 +180,53 @@ class DataManager:
         )
         self.df['DayOfWeek'] = self.df['Date'].dt.day_name()
 
-    def _categorize_time_period(self, time_str):
-        """Categorize time into periods of the day."""
-        if not time_str or pd.isna(time_str):
-            return None
-
-        try:
-            hours = int(time_str.split(':')[0])
-
-            if 6 <= hours < 12:
-                return 'morning'
-            elif 12 <= hours < 18:
-                return 'afternoon'
-            elif 18 <= hours < 21:
-                return 'evening'
-            else:
-                return 'night'
-        except:
-            return None
+    def _add_hour(self):
+        """Add integer Hour column parsed from IncidentTime, UNKNOWN_HOUR when missing or invalid."""
+        hours = pd.to_numeric(
+            self.df['IncidentTime'].str.extract(r'^\s*(\d+)\s*(?::|$)', expand=False),
+            errors='coerce'
+        )
+        hours = hours.where((hours >= 0) & (hours < 24), UNKNOWN_HOUR)
+        self.df['Hour'] = hours.astype('int8')
 
     def _add_time_period(self):
-        """Add time period column based on IncidentTime."""
-        self.df['TimePeriod'] = self.df['IncidentTime'].apply(self._categorize_time_period)
-
-    def _create_hover_text(self):
-        """Create hover text for map points."""
-        self.df['hover_text'] = self.df.apply(
-            lambda row: f"""
-<b>Year:</b> {int(row['Year']) if pd.notnull(row['Year']) else 'Unknown'}<br>
-<b>Shark Species:</b> {row['SharkName'] if pd.notnull(row['SharkName']) else 'Unknown'}<br>
-<b>Activity:</b> {row['Activity'] if pd.notnull(row['Activity']) else 'Unknown'}<br>
-<b>Injury:</b> {row['Injury'] if pd.notnull(row['Injury']) else 'Unknown'}<br>
-<b>Gender:</b> {row['Gender'] if pd.notnull(row['Gender']) else 'Unknown'}<br>
-<b>Age:</b> {int(row['Age']) if pd.notnull(row['Age']) else 'Unknown'}<br>
-<b>Time:</b> {row['IncidentTime'] if pd.notnull(row['IncidentTime']) else 'Unknown'}<br>
-<b>Time Period:</b> {row['TimePeriod'].title() if pd.notnull(row['TimePeriod']) else 'Unknown'}
-""",
-            axis=1
-        )
+        """Add time period column based on the parsed Hour."""
+        hours = self.df['Hour'].to_numpy()
+        periods = TIME_PERIOD_LABELS[np.digitize(hours, TIME_PERIOD_BINS)]
+        self.df['TimePeriod'] = np.where(hours == UNKNOWN_HOUR, None, periods)
+
+    def _apply_compact_schema(self):
+        """Convert label columns to categoricals and numeric columns to narrow dtypes."""
+        for column, categories in DATA_SETTINGS['categories'].items():
+            observed = self.df[column].dropna().unique()
+            extra = sorted(set(observed) - set(categories))
+            self.df[column] = pd.Categorical(self.df[column], categories=list(categories) + extra)
+
+        for column, dtype in DATA_SETTINGS['numeric_dtypes'].items():
+            self.df[column] = self.df[column].astype(dtype)
+
+    def _add_age_group(self):
+        """Add categorical AgeGroup column bucketing Age by the configured edges."""
+        edges = DATA_SETTINGS['age_group_edges']
+        labels = age_group_labels(edges)
+        ages = self.df['Age'].to_numpy()
+        codes = np.digitize(ages, edges, right=True)
+        codes[np.isnan(ages)] = labels.index(UNKNOWN_AGE_GROUP)
+        self.df['AgeGroup'] = pd.Categorical.from_codes(codes, categories=labels)
+
+    def _age_group_extents(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the lowest and highest recorded age in each AgeGroup, NaN for groups without one."""
+        codes = self.df['AgeGroup'].cat.codes.to_numpy()
+        ages = self.df['Age'].to_numpy(dtype=np.float64)
+        lows = np.full(len(self.df['AgeGroup'].cat.categories), np.nan)
+        highs = lows.copy()
+        np.fmin.at(lows, codes, ages)
+        np.fmax.at(highs, codes, ages)
+        return lows, highs
+
+    def memory_footprint(self) -> pd.Series:
+        """Get the in-memory size of each column of the incident frame in bytes."""
+        return self.df.memory_usage(index=False, deep=True).sort_values(ascending=False)
 
     def filter_data(self, selected_states: Optional[List[str]] = None,
                     age_range: Optional[List[float]] = None,
@@ -116,81 +241,7 @@ class DataManager:
                     selected_sharks: Optional[List[str]] = None,
                     selected_injuries: Optional[List[str]] = None) -> pd.DataFrame:
         """Filter data based on selected criteria."""
-        df_filtered = self.df.copy()
-
-        if selected_states:
-            # Handle both state codes and full names
-            selected_short_states = []
-            for state in selected_states:
-                if state in REVERSE_STATE_MAPPING:  # If it's a full name
-                    selected_short_states.append(REVERSE_STATE_MAPPING[state])
-                elif state in STATE_NAME_MAPPING:   # If it's already a state code
-                    selected_short_states.append(state)
-            
-            df_filtered = df_filtered[df_filtered['State'].isin(selected_short_states)]
-
-        # Rest of the filtering logic remains the same
-        if age_range:
-            df_filtered = df_filtered[
-                (df_filtered['Age'] >= age_range[0]) &
-                (df_filtered['Age'] <= age_range[1])
-            ]
-
-        if month_range:
-            df_filtered = df_filtered[
-                (df_filtered['Month'] >= month_range[0]) &
-                (df_filtered['Month'] <= month_range[1])
-            ]
-
-        if day_range:
-            df_filtered = df_filtered[
-                (df_filtered['Day'] >= day_range[0]) &
-                (df_filtered['Day'] <= day_range[1])
-            ]
-
-        if year_range:
-            df_filtered = df_filtered[
-                (df_filtered['Year'] >= year_range[0]) &
-                (df_filtered['Year'] <= year_range[1])
-            ]
-
-        if selected_days and len(selected_days) > 0:
-            df_filtered = df_filtered[df_filtered['DayOfWeek'].isin(selected_days)]
-
-        if selected_genders and len(selected_genders) > 0:
-            df_filtered = df_filtered[df_filtered['Gender'].isin(selected_genders)]
-
-        if selected_months and len(selected_months) > 0:
-            df_filtered = df_filtered[df_filtered['Month'].isin(selected_months)]
-
-        if selected_activities and len(selected_activities) > 0:
-            df_filtered = df_filtered[df_filtered['Activity'].isin(selected_activities)]
-
-        if selected_time_periods and len(selected_time_periods) > 0:
-            df_filtered = df_filtered[df_filtered['TimePeriod'].isin(selected_time_periods)]
-
-        if selected_sharks and len(selected_sharks) > 0:
-            df_filtered = df_filtered[df_filtered['SharkName'].isin(selected_sharks)]
-
-        if selected_injuries and len(selected_injuries) > 0:
-            df_filtered = df_filtered[df_filtered['Injury'].str.lower().isin(selected_injuries)]
-
-        return df_filtered
-    def get_attacks_by_state(self, selected_injuries: Optional[List[str]] = None,
-                             selected_states: Optional[List[str]] = None,
-                             age_range: Optional[List[float]] = None,
-                             month_range: Optional[List[int]] = None,
-                             day_range: Optional[List[int]] = None,
-                             year_range: Optional[List[int]] = None,
-                             selected_days: Optional[List[str]] = None,
-                             selected_genders: Optional[List[str]] = None,
-                             selected_months: Optional[List[int]] = None,
-                             selected_activities: Optional[List[str]] = None,
-                             selected_time_periods: Optional[List[str]] = None,
-                             selected_sharks: Optional[List[str]] = None) -> pd.Series:
-        """Get attack counts by state."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
+        spec = FilterSpec.from_filters(
             selected_states=selected_states,
             age_range=age_range,
             month_range=month_range,
@@ -201,103 +252,174 @@ class DataManager:
             selected_months=selected_months,
             selected_activities=selected_activities,
             selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
+            selected_sharks=selected_sharks,
+            selected_injuries=selected_injuries
         )
-        return df_filtered['State'].value_counts()
-
-    def get_activity_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                  selected_states: Optional[List[str]] = None,
-                                  age_range: Optional[List[float]] = None,
-                                  month_range: Optional[List[int]] = None,
-                                  day_range: Optional[List[int]] = None,
-                                  year_range: Optional[List[int]] = None,
-                                  selected_days: Optional[List[str]] = None,
-                                  selected_genders: Optional[List[str]] = None,
-                                  selected_months: Optional[List[int]] = None,
-                                  selected_activities: Optional[List[str]] = None,
-                                  selected_time_periods: Optional[List[str]] = None,
-                                  selected_sharks: Optional[List[str]] = None) -> pd.Series:
-        """Get distribution of activities."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
+        return self.df.take(self.select_rows(spec))
+
+    def gather(self, rows: np.ndarray, columns: List[str]) -> pd.DataFrame:
+        """Build a frame of only the given columns at row positions or a boolean row mask."""
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return pd.DataFrame(
+            {column: self.df[column].array.take(rows) for column in columns},
+            index=self.df.index.take(rows)
         )
+
+    def select_rows(self, spec: FilterSpec) -> np.ndarray:
+        """Get the positions of the rows matching a filter spec, using the selection cache."""
+        rows = self.selection_cache.get(spec)
+        if rows is None:
+            rows = self._evaluate(spec)
+            self.selection_cache.put(spec, rows)
+        return rows
+
+    def _cube_predicates(self, spec: FilterSpec) -> Optional[Tuple[Dict, Dict]]:
+        """Express a spec as count cube filters and ranges, or None when the cube cannot answer it.
+
+        An age range becomes an AgeGroup filter when it splits no age group,
+        which holds for the default age slider: the recorded ages of every
+        group lie either all inside or all outside the range.
+        """
+        cube = self.count_cube
+        if cube is None:
+            return None
+        filters, ranges = spec.value_predicates(), spec.range_predicates()
+        if 'Age' in ranges and 'Age' not in cube.labels and 'AgeGroup' in cube.labels:
+            low, high = ranges.pop('Age')
+            lows, highs = self.age_group_extents
+            recorded = ~np.isnan(lows)
+            inside = recorded & (lows >= low) & (highs <= high)
+            outside = ~recorded | (highs < low) | (lows > high)
+            if not np.all(inside | outside):
+                return None
+            filters['AgeGroup'] = tuple(cube.labels['AgeGroup'][inside])
+        if not all(column in cube.labels for column in list(filters) + list(ranges)):
+            return None
+        return filters, ranges
+
+    def crossfilter(self, session: str) -> Crossfilter:
+        """Get the crossfilter of a dashboard session, starting one with no filters for a new session."""
+        crossfilter = self.crossfilters.get(session)
+        if crossfilter is None:
+            crossfilter = self.crossfilter_index.session()
+            self.crossfilters.put(session, crossfilter)
+        return crossfilter
+
+    def aggregate(self, spec: Optional[FilterSpec] = None, session: Optional[str] = None,
+                  **filters) -> AggregateBundle:
+        """Count every configured aggregation for a spec.
+
+        When the count cube can answer the spec, the aggregations over cube
+        dimensions are summed from it. With a session id the rest come from
+        that session's crossfilter, moved over from the session's previous
+        spec; without one they are counted in one pass over the selected rows.
+        Bundles are kept per spec, so the charts of one callback share the work.
+        """
+        spec = resolve_spec(spec, filters)
+        bundle = self.bundle_cache.get(spec)
+        if bundle is not None:
+            return bundle
+
+        counts = {}
+        predicates = self._cube_predicates(spec)
+        if predicates is not None:
+            cube = self.count_cube
+            for name, dimensions in self.aggregator.aggregations.items():
+                if all(column in cube.labels for column in dimensions):
+                    counts[name] = cube.count(dimensions, *predicates)
+        remaining = [name for name in self.aggregator.aggregations if name not in counts]
+        if remaining and session is not None:
+            counts.update(self.crossfilter(session).move_to(spec, remaining))
+        elif remaining:
+            counts.update(self.aggregator.count(self.select_rows(spec), remaining))
+        bundle = self.aggregator.bundle(spec, counts)
+        self.bundle_cache.put(spec, bundle)
+        return bundle
+
+    def get_map_clusters(self, zoom: float, spec: Optional[FilterSpec] = None, **filters) -> pd.DataFrame:
+        """Get the incident clusters of the selection at a map zoom, with counts and dominant values."""
+        spec = resolve_spec(spec, filters)
+        return self.cluster_index.clusters(self.select_rows(spec), zoom)
+
+    def get_map_points(self, bounds: Bounds, spec: Optional[FilterSpec] = None, **filters) -> np.ndarray:
+        """Get the positions of the selected rows inside bounds, sampled down to the point budget."""
+        spec = resolve_spec(spec, filters)
+        rows = self.select_rows(spec)
+        lon = self.cluster_index.longitude[rows]
+        lat = self.cluster_index.latitude[rows]
+        inside = in_bounds(lon, lat, bounds)
+        return stratified_sample(rows[inside], lon[inside], lat[inside], bounds,
+                                 MAP_SETTINGS['point_budget'], MAP_SETTINGS['sample_grid'])
+
+    def get_density_bins(self, zoom: float, spec: Optional[FilterSpec] = None,
+                         bounds: Optional[Bounds] = None, **filters) -> pd.DataFrame:
+        """Get the heatmap bins of the selection at a map zoom, with their centroids and counts.
+
+        With bounds, only the selected rows inside them are binned, so the
+        number of bins is limited by the area on screen.
+        """
+        spec = resolve_spec(spec, filters)
+        rows = self.select_rows(spec)
+        if bounds is not None:
+            rows = rows[in_bounds(self.density_index.longitude[rows], self.density_index.latitude[rows], bounds)]
+        return self.density_index.clusters(rows, zoom)
+
+    def get_stream_layout(self, spec: FilterSpec, baseline: str = 'symmetric',
+                          top_n: Optional[int] = None) -> StreamLayout:
+        """Get the stacked year x species layers of the streamgraph, cached per spec and layout."""
+        if top_n is None:
+            top_n = DATA_SETTINGS['top_n_stream_species']
+        key = (spec, baseline, top_n)
+        layout = self.stream_cache.get(key)
+        if layout is None:
+            bundle = self.aggregate(spec)
+            years, species = (bundle.labels[column] for column in bundle.dimensions['year_species'])
+            layout = stream_layout(years.to_numpy(), species.tolist(),
+                                   bundle.counts['year_species'], top_n, baseline)
+            self.stream_cache.put(key, layout)
+        return layout
+
+    def _top_counts(self, counts: pd.Series) -> pd.Series:
+        """Drop zero counts and sort descending, keeping label order among ties."""
+        counts = counts[counts > 0]
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def _evaluate(self, spec: FilterSpec) -> np.ndarray:
+        """Resolve a filter spec to row positions through the query planner."""
+        return self.query_planner.execute(spec)
+
+    def explain(self, spec: Optional[FilterSpec] = None, **filters) -> pd.DataFrame:
+        """Report the filter plan for a spec, or the given filter keywords when spec is None."""
+        spec = resolve_spec(spec, filters)
+        return self.query_planner.explain(spec)
+
+    def get_attacks_by_state(self, spec: Optional[FilterSpec] = None, **filters) -> pd.Series:
+        """Get attack counts by state."""
+        spec = resolve_spec(spec, filters)
+        return self._top_counts(self.aggregate(spec).series('state'))
+
+    def get_activity_distribution(self, spec: Optional[FilterSpec] = None, **filters) -> pd.Series:
+        """Get distribution of activities."""
+        spec = resolve_spec(spec, filters)
         # Calculate percentages
-        activity_counts = df_filtered['Activity'].value_counts()
+        activity_counts = self._top_counts(self.aggregate(spec).series('activity'))
         total_activities = activity_counts.sum()
         activity_percentages = (activity_counts / total_activities * 100).round(1)
 
         return activity_percentages.head(DATA_SETTINGS['top_n_activities'])
 
-    def get_shark_species_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                       selected_states: Optional[List[str]] = None,
-                                       age_range: Optional[List[float]] = None,
-                                       month_range: Optional[List[int]] = None,
-                                       day_range: Optional[List[int]] = None,
-                                       year_range: Optional[List[int]] = None,
-                                       selected_days: Optional[List[str]] = None,
-                                       selected_genders: Optional[List[str]] = None,
-                                       selected_months: Optional[List[int]] = None,
-                                       selected_activities: Optional[List[str]] = None,
-                                       selected_time_periods: Optional[List[str]] = None,
-                                       selected_sharks: Optional[List[str]] = None) -> pd.Series:
+    def get_shark_species_distribution(self, spec: Optional[FilterSpec] = None, **filters) -> pd.Series:
         """Get distribution of shark species."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
-        return df_filtered['SharkName'].value_counts().head(DATA_SETTINGS['top_n_species'])
-
-    def get_day_distribution(self, selected_injuries: Optional[List[str]] = None,
-                             selected_states: Optional[List[str]] = None,
-                             age_range: Optional[List[float]] = None,
-                             month_range: Optional[List[int]] = None,
-                             day_range: Optional[List[int]] = None,
-                             year_range: Optional[List[int]] = None,
-                             selected_days: Optional[List[str]] = None,
-                             selected_genders: Optional[List[str]] = None,
-                             selected_months: Optional[List[int]] = None,
-                             selected_activities: Optional[List[str]] = None,
-                             selected_time_periods: Optional[List[str]] = None,
-                             selected_sharks: Optional[List[str]] = None) -> pd.Series:
+        spec = resolve_spec(spec, filters)
+        return self._top_counts(self.aggregate(spec).series('species')).head(DATA_SETTINGS['top_n_species'])
+
+    def get_day_distribution(self, spec: Optional[FilterSpec] = None, **filters) -> pd.Series:
         """Get distribution of attacks by day of week with percentages."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        spec = resolve_spec(spec, filters)
 
         # Get day counts and calculate percentages
-        day_counts = df_filtered['DayOfWeek'].value_counts()
+        day_counts = self.aggregate(spec).series('day')
         total_attacks = day_counts.sum()
         day_percentages = (day_counts / total_attacks * 100).round(1)
 
@@ -305,33 +427,9 @@ class DataManager:
         days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         return day_percentages.reindex(days_order).fillna(0)
 
-    def get_monthly_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                 selected_states: Optional[List[str]] = None,
-                                 age_range: Optional[List[float]] = None,
-                                 month_range: Optional[List[int]] = None,
-                                 day_range: Optional[List[int]] = None,
-                                 year_range: Optional[List[int]] = None,
-                                 selected_days: Optional[List[str]] = None,
-                                 selected_genders: Optional[List[str]] = None,
-                                 selected_months: Optional[List[int]] = None,
-                                 selected_activities: Optional[List[str]] = None,
-                                 selected_time_periods: Optional[List[str]] = None,
-                                 selected_sharks: Optional[List[str]] = None) -> pd.Series:
+    def get_monthly_distribution(self, spec: Optional[FilterSpec] = None, **filters) -> pd.Series:
         """Get monthly distribution of attacks with percentages."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        spec = resolve_spec(spec, filters)
 
         # Create a month name mapping
         month_names = {
@@ -340,7 +438,8 @@ class DataManager:
             9: 'September', 10: 'October', 11: 'November', 12: 'December'
         }
 
-        monthly_counts = df_filtered['Month'].value_counts()
+        monthly_counts = self.aggregate(spec).series('month')
+        monthly_counts = monthly_counts[monthly_counts > 0]
         total_attacks = monthly_counts.sum()
 
         # Convert to percentages and sort by month number
@@ -351,120 +450,33 @@ class DataManager:
 
         return monthly_percentages
 
-    def get_age_distribution(self, selected_injuries: Optional[List[str]] = None,
-                             selected_states: Optional[List[str]] = None,
-                             age_range: Optional[List[float]] = None,
-                             month_range: Optional[List[int]] = None,
-                             day_range: Optional[List[int]] = None,
-                             year_range: Optional[List[int]] = None,
-                             selected_days: Optional[List[str]] = None,
-                             selected_genders: Optional[List[str]] = None,
-                             selected_months: Optional[List[int]] = None,
-                             selected_activities: Optional[List[str]] = None,
-                             selected_time_periods: Optional[List[str]] = None,
-                             selected_sharks: Optional[List[str]] = None) -> pd.Series:
+    def get_age_distribution(self, spec: Optional[FilterSpec] = None, **filters) -> pd.Series:
         """Get distribution of attacks by age groups."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        spec = resolve_spec(spec, filters)
 
-        def categorize_age(age):
-            if pd.isna(age):
-                return 'Unknown'
-            elif age <= 12:
-                return '0-12'
-            elif age <= 17:
-                return '13-17'
-            elif age <= 24:
-                return '18-24'
-            elif age <= 34:
-                return '25-34'
-            elif age <= 44:
-                return '35-44'
-            elif age <= 54:
-                return '45-54'
-            else:
-                return '55+'
-
-        df_filtered['AgeGroup'] = df_filtered['Age'].apply(categorize_age)
-        age_counts = df_filtered['AgeGroup'].value_counts()
+        age_counts = self.aggregate(spec).series('age_group')
         total_attacks = age_counts.sum()
         age_percentages = (age_counts / total_attacks * 100).round(1)
 
-        # Sort by age group order
-        age_group_order = ['0-12', '13-17', '18-24', '25-34', '35-44', '45-54', '55+', 'Unknown']
-        return age_percentages.reindex(age_group_order).fillna(0)
+        # Counts already come in age group order
+        return age_percentages.fillna(0)
 
-    def get_gender_age_provocation_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                                selected_states=None, age_range=None,
-                                                month_range=None, day_range=None, year_range=None,
-                                                selected_days=None, selected_genders=None,
-                                                selected_months=None, selected_activities=None,
-                                                selected_time_periods=None, selected_sharks=None):
+    def get_gender_age_provocation_distribution(self, spec: Optional[FilterSpec] = None, **filters) -> pd.DataFrame:
         """Get distribution of attacks by age groups, gender, and provocation."""
-        df_filtered = self.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
+        spec = resolve_spec(spec, filters)
+        bundle = self.aggregate(spec)
+        genders, age_groups, provocations = (
+            bundle.labels[column] for column in bundle.dimensions['gender_age_provocation']
         )
 
-        def categorize_age(age):
-            if pd.isna(age):
-                return 'Unknown'
-            elif age <= 12:
-                return '0-12'
-            elif age <= 17:
-                return '13-17'
-            elif age <= 24:
-                return '18-24'
-            elif age <= 34:
-                return '25-34'
-            elif age <= 44:
-                return '35-44'
-            elif age <= 54:
-                return '45-54'
-            else:
-                return '55+'
-
-        df_filtered['AgeGroup'] = df_filtered['Age'].apply(categorize_age)
-
-        # Create MultiIndex DataFrame for all combinations
-        male_provoked = df_filtered[(df_filtered['Gender'] == 'male') &
-                                    (df_filtered['Provocation'] == 'provoked')]['AgeGroup'].value_counts()
-        male_unprovoked = df_filtered[(df_filtered['Gender'] == 'male') &
-                                      (df_filtered['Provocation'] == 'unprovoked')]['AgeGroup'].value_counts()
-        female_provoked = df_filtered[(df_filtered['Gender'] == 'female') &
-                                      (df_filtered['Provocation'] == 'provoked')]['AgeGroup'].value_counts()
-        female_unprovoked = df_filtered[(df_filtered['Gender'] == 'female') &
-                                        (df_filtered['Provocation'] == 'unprovoked')]['AgeGroup'].value_counts()
-
-        # Create DataFrame with all categories
-        age_groups = ['0-12', '13-17', '18-24', '25-34', '35-44', '45-54', '55+', 'Unknown']
-        df_counts = pd.DataFrame({
-            'Male_Provoked': male_provoked.reindex(age_groups).fillna(0),
-            'Male_Unprovoked': male_unprovoked.reindex(age_groups).fillna(0),
-            'Female_Provoked': female_provoked.reindex(age_groups).fillna(0),
-            'Female_Unprovoked': female_unprovoked.reindex(age_groups).fillna(0)
-        }, index=age_groups)
+        # Age groups as rows and one column per gender and provocation pair, named
+        # like Male_Provoked; extra genders or provocation values add columns
+        counts = bundle.counts['gender_age_provocation'].transpose(1, 0, 2)
+        df_counts = pd.DataFrame(
+            counts.reshape(len(age_groups), len(genders) * len(provocations)),
+            index=age_groups,
+            columns=[f'{gender.title()}_{provocation.title()}'
+                     for gender in genders for provocation in provocations]
+        )
 
         return df_counts
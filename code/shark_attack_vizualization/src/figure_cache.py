@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import plotly.graph_objects as go
+import plotly.io as pio
+from collections import OrderedDict
+from typing import Dict, Optional
+from filter_spec import FilterSpec
+
+
+def figure_key(chart_id: str, spec: FilterSpec, options: Dict) -> str:
+    """Digest identifying a chart drawn for a filter selection with the given extra arguments."""
+    payload = json.dumps([chart_id, repr(spec), sorted(options.items())], default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class FigureCache:
+    def __init__(self, max_size: int, directory: Optional[str] = None, max_disk_entries: int = 0,
+                 disk_slack: float = 0.1):
+        """Two-tier cache of finished figures: an in-process LRU over an optional directory of JSON files.
+
+        The directory is shared by all worker processes. Its entries live in one
+        subdirectory per version, and switching to a new version drops the
+        in-process entries and deletes the other subdirectories. Each tier keeps
+        at most its configured number of entries, evicting the least recently
+        used. The disk tier is only rescanned and trimmed once this process
+        counts more files than the limit plus a disk_slack fraction of it, so
+        writes do not list the directory each time. Cached figures are shared
+        between callers and must not be modified.
+        """
+        self.max_size = max_size
+        self.directory = directory if max_disk_entries > 0 else None
+        self.max_disk_entries = max_disk_entries
+        self.disk_slack = max(1, int(max_disk_entries * disk_slack))
+        # Files in the current version's directory as last scanned plus the
+        # files written since; other workers' writes are only seen on the next scan
+        self._disk_count: Optional[int] = None
+        self.version: Optional[str] = None
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                         'evictions': 0, 'disk_evictions': 0, 'invalidations': 0}
+        self._entries: 'OrderedDict[str, go.Figure]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_version(self, version: str):
+        """Switch to a dataset/settings version, invalidating everything cached for another one."""
+        if version == self.version:
+            return
+        with self._lock:
+            if self.version is not None:
+                self.counters['invalidations'] += 1
+            self.version = version
+            self._entries.clear()
+            self._disk_count = None
+        if self.directory is not None and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name != version:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _path(self, key: str) -> Optional[str]:
+        if self.directory is None or self.version is None:
+            return None
+        return os.path.join(self.directory, self.version, f'{key}.json')
+
+    def get(self, key: str) -> Optional[go.Figure]:
+        """Look up a figure in memory, then on disk, counting where it was found."""
+        with self._lock:
+            figure = self._entries.get(key)
+            if figure is not None:
+                self._entries.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return figure
+
+        path = self._path(key)
+        if path is not None:
+            try:
+                with open(path) as f:
+                    figure = pio.from_json(f.read())
+                # The file mtime doubles as its last use for disk eviction
+                os.utime(path)
+            except (OSError, ValueError):
+                figure = None
+        with self._lock:
+            if figure is None:
+                self.counters['misses'] += 1
+                return None
+            self.counters['disk_hits'] += 1
+        self._remember(key, figure)
+        return figure
+
+    def put(self, key: str, figure: go.Figure):
+        """Store a freshly built figure in both tiers."""
+        self._remember(key, figure)
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            staging = f'{path}.tmp{os.getpid()}'
+            with open(staging, 'w') as f:
+                f.write(figure.to_json())
+            os.replace(staging, path)
+            with self._lock:
+                if self._disk_count is not None:
+                    self._disk_count += 1
+                due = self._disk_count is None or self._disk_count > self.max_disk_entries + self.disk_slack
+            if due:
+                self._evict_disk(os.path.dirname(path))
+        except OSError:
+            # A read-only or full disk only loses the shared tier
+            pass
+
+    def _remember(self, key: str, figure: go.Figure):
+        with self._lock:
+            self._entries[key] = figure
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def _evict_disk(self, directory: str):
+        """Count the files on disk and delete the least recently used ones beyond the limit."""
+        files = [entry for entry in os.scandir(directory) if entry.name.endswith('.json')]
+        with self._lock:
+            self._disk_count = min(len(files), self.max_disk_entries)
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+                with self._lock:
+                    self.counters['disk_evictions'] += 1
+            except OSError:
+                # Another worker removed it first
+                pass
+
+    def clear(self):
+        """Drop the in-process entries, keeping the counters and the files on disk."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Get the hit/miss/eviction counters and the current number of in-process entries."""
+        with self._lock:
+            return dict(self.counters, size=len(self._entries), max_size=self.max_size)
@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from config import REVERSE_STATE_MAPPING, STATE_NAME_MAPPING
+
+
+# Column constrained by each value-list field of FilterSpec
+VALUE_FILTER_COLUMNS = {
+    'selected_states': 'State',
+    'selected_days': 'DayOfWeek',
+    'selected_genders': 'Gender',
+    'selected_months': 'Month',
+    'selected_activities': 'Activity',
+    'selected_time_periods': 'TimePeriod',
+    'selected_sharks': 'SharkName',
+    'selected_injuries': 'Injury'
+}
+
+# Column constrained by each [low, high] range field of FilterSpec
+RANGE_FILTER_COLUMNS = {
+    'age_range': 'Age',
+    'month_range': 'Month',
+    'day_range': 'Day',
+    'year_range': 'Year'
+}
+
+
+def _normalize_values(values: Optional[Iterable]) -> Optional[Tuple]:
+    """Turn a selection list into a sorted tuple of unique values, None when empty."""
+    if not values:
+        return None
+    return tuple(sorted(set(values), key=repr))
+
+
+def _normalize_range(bounds: Optional[Iterable]) -> Optional[Tuple]:
+    """Turn a [low, high] slider value into a tuple, None when unset."""
+    if not bounds:
+        return None
+    return tuple(bounds)
+
+
+def resolve_states(selected_states: Iterable[str]) -> Tuple[str, ...]:
+    """Map selected state names or codes to state codes, dropping unknown entries."""
+    codes = set()
+    for state in selected_states:
+        if state in REVERSE_STATE_MAPPING:  # If it's a full name
+            codes.add(REVERSE_STATE_MAPPING[state])
+        elif state in STATE_NAME_MAPPING:   # If it's already a state code
+            codes.add(state)
+    return tuple(sorted(codes))
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Normalised, hashable form of the dashboard filter parameters.
+
+    Field names match the filter_data keyword arguments. A value of None means
+    the filter is not applied. selected_states holds state codes; it can be an
+    empty tuple when a selection was made but none of it names a known state,
+    which matches no rows.
+    """
+    selected_states: Optional[Tuple[str, ...]] = None
+    age_range: Optional[Tuple] = None
+    month_range: Optional[Tuple] = None
+    day_range: Optional[Tuple] = None
+    year_range: Optional[Tuple] = None
+    selected_days: Optional[Tuple] = None
+    selected_genders: Optional[Tuple] = None
+    selected_months: Optional[Tuple] = None
+    selected_activities: Optional[Tuple] = None
+    selected_time_periods: Optional[Tuple] = None
+    selected_sharks: Optional[Tuple] = None
+    selected_injuries: Optional[Tuple] = None
+
+    @classmethod
+    def from_filters(cls, selected_states=None, age_range=None, month_range=None,
+                     day_range=None, year_range=None, selected_days=None,
+                     selected_genders=None, selected_months=None,
+                     selected_activities=None, selected_time_periods=None,
+                     selected_sharks=None, selected_injuries=None) -> 'FilterSpec':
+        """Build a spec from the raw filter_data keyword arguments."""
+        return cls(
+            selected_states=resolve_states(selected_states) if selected_states else None,
+            age_range=_normalize_range(age_range),
+            month_range=_normalize_range(month_range),
+            day_range=_normalize_range(day_range),
+            year_range=_normalize_range(year_range),
+            selected_days=_normalize_values(selected_days),
+            selected_genders=_normalize_values(selected_genders),
+            selected_months=_normalize_values(selected_months),
+            selected_activities=_normalize_values(selected_activities),
+            selected_time_periods=_normalize_values(selected_time_periods),
+            selected_sharks=_normalize_values(selected_sharks),
+            selected_injuries=_normalize_values(selected_injuries)
+        )
+
+    def value_predicates(self) -> Dict[str, Tuple]:
+        """Get the active value-list filters keyed by the column they constrain."""
+        return {column: getattr(self, name) for name, column in VALUE_FILTER_COLUMNS.items()
+                if getattr(self, name) is not None}
+
+    def range_predicates(self) -> Dict[str, Tuple]:
+        """Get the active range filters keyed by the column they constrain."""
+        return {column: getattr(self, name) for name, column in RANGE_FILTER_COLUMNS.items()
+                if getattr(self, name) is not None}
+
+    def as_dict(self) -> Dict:
+        """Get the active filters as keyword arguments."""
+        return {f.name: getattr(self, f.name) for f in fields(self)
+                if getattr(self, f.name) is not None}
+
+
+def resolve_spec(spec: Optional[FilterSpec], filters: Dict) -> FilterSpec:
+    """Use the given spec, or build one from filter_data keyword arguments when it is None."""
+    return spec if spec is not None else FilterSpec.from_filters(**filters)
+
+
+class SelectionCache:
+    def __init__(self, max_size: int):
+        """Bounded LRU mapping a FilterSpec (or a key built from one) to a result derived from it."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Look up a cached result, counting the hit or miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a result, evicting the least recently used entry if full."""
+        # Cached arrays are shared between callers, so make them read-only
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached entries, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'max_size': self.max_size}
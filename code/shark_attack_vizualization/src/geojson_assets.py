@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+from shapely.ops import linemerge, polygonize, unary_union
+from typing import Dict, List, Optional
+
+
+def simplify_features(geojson: Dict, tolerance: float, precision: int) -> Dict:
+    """Simplify the feature polygons while keeping shared borders identical.
+
+    All boundaries are noded together and split into arcs between junctions,
+    each arc is simplified once, and the faces rebuilt from the simplified
+    arcs are handed back to the feature that contains them. Neighbouring
+    features therefore keep one common border with no gaps or overlaps.
+    Coordinates are rounded to the given number of decimals.
+    """
+    features = geojson['features']
+    geometries = [shape(feature['geometry']) for feature in features]
+    arcs = linemerge(unary_union([geometry.boundary for geometry in geometries]))
+    arcs = getattr(arcs, 'geoms', [arcs])
+    simplified = [arc.simplify(tolerance, preserve_topology=True) for arc in arcs]
+    faces = np.array(list(polygonize(unary_union(simplified))), dtype=object)
+
+    # Query with the features as the (prepared) input geometries; faces lying in
+    # no feature are dropped, and a face claimed twice goes to the first feature
+    points = shapely.point_on_surface(faces)
+    owner, face_index = shapely.STRtree(points).query(geometries, predicate='contains')
+    face_index, first = np.unique(face_index, return_index=True)
+    owner = owner[first]
+    result = []
+    for i, feature in enumerate(features):
+        merged = shapely.coverage_union_all(faces[face_index[owner == i]])
+        # Snap to the precision grid (keeping the polygons valid), then round so
+        # the snapped values also serialise as short decimals
+        merged = shapely.set_precision(merged, 10.0 ** -precision)
+        merged = shapely.transform(merged, lambda coords: np.round(coords, precision))
+        result.append({
+            'type': 'Feature',
+            'properties': feature['properties'],
+            'geometry': mapping(merged)
+        })
+    return {'type': 'FeatureCollection', 'features': result}
+
+
+def _asset_name(source_digest: str, band: Dict) -> str:
+    """Name an asset after the source content and band settings so a changed file gets a new URL."""
+    digest = hashlib.sha256((source_digest + json.dumps(band, sort_keys=True)).encode()).hexdigest()
+    return f"states-z{band['min_zoom']}-{digest[:12]}.json"
+
+
+def build_geojson_assets(source_path: str, geojson: Dict, directory: str,
+                         bands: List[Dict]) -> List[Dict]:
+    """Write one simplified copy of the GeoJSON per zoom band, reusing copies already on disk.
+
+    Returns the bands sorted by min_zoom, each with the file name of its copy.
+    """
+    with open(source_path, 'rb') as f:
+        source_digest = hashlib.sha256(f.read()).hexdigest()
+    os.makedirs(directory, exist_ok=True)
+
+    assets = []
+    for band in sorted(bands, key=lambda band: band['min_zoom']):
+        name = _asset_name(source_digest, band)
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            simplified = simplify_features(geojson, band['tolerance'], band['precision'])
+            staging = f'{path}.tmp{os.getpid()}'
+            with open(staging, 'w') as f:
+                json.dump(simplified, f, separators=(',', ':'))
+            os.replace(staging, path)
+        assets.append(dict(band, file=name))
+    return assets
+
+
+def asset_for_zoom(assets: List[Dict], zoom: float) -> Optional[Dict]:
+    """Pick the most detailed band whose min_zoom is at or below the zoom."""
+    chosen = None
+    for asset in assets:
+        if asset['min_zoom'] <= zoom:
+            chosen = asset
+    return chosen if chosen is not None else (assets[0] if assets else None)
@@ -0,0 +1,107 @@
+import time
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from bitmap_index import BitmapIndex
+from filter_spec import FilterSpec
+from sorted_index import SortedIndex
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """One predicate of a filter plan with its load-time row estimate."""
+    kind: str  # 'value' or 'range'
+    column: str
+    predicate: Tuple
+    estimated_rows: int
+
+
+class QueryPlanner:
+    def __init__(self, bitmap_index: BitmapIndex, sorted_indexes: Dict[str, SortedIndex],
+                 range_values: Dict[str, np.ndarray]):
+        """Order filter predicates by estimated selectivity and evaluate them on the indexes.
+
+        Value predicates are estimated from the per-value counts of the bitmap
+        index and range predicates exactly from their sorted index. The most
+        selective predicate produces the candidate rows; the rest only check
+        those candidates, stopping as soon as none are left.
+        """
+        self.n_rows = bitmap_index.n_rows
+        self.bitmap_index = bitmap_index
+        self.sorted_indexes = sorted_indexes
+        self.range_values = range_values
+
+    def plan(self, spec: FilterSpec) -> List[PlanStep]:
+        """Get the predicates of a spec, most selective first."""
+        steps = [
+            PlanStep('value', column, values, self.bitmap_index.estimate(column, values))
+            for column, values in spec.value_predicates().items()
+        ]
+        steps += [
+            PlanStep('range', column, bounds, self.sorted_indexes[column].count(bounds[0], bounds[1]))
+            for column, bounds in spec.range_predicates().items()
+        ]
+        return sorted(steps, key=lambda step: step.estimated_rows)
+
+    def execute(self, spec: FilterSpec, trace: Optional[List[Dict]] = None) -> np.ndarray:
+        """Resolve a spec to sorted row positions, recording each step into trace if given."""
+        rows = None
+        for step in self.plan(spec):
+            started = time.perf_counter() if trace is not None else 0.0
+            rows = self._candidates(step) if rows is None else self._refine(step, rows)
+            if trace is not None:
+                trace.append({
+                    'kind': step.kind,
+                    'column': step.column,
+                    'predicate': step.predicate,
+                    'estimated_rows': step.estimated_rows,
+                    'actual_rows': len(rows),
+                    'time_ms': (time.perf_counter() - started) * 1000
+                })
+            if len(rows) == 0:
+                break
+
+        if rows is None:
+            return np.arange(self.n_rows)
+        return np.sort(rows).astype(np.intp)
+
+    def explain(self, spec: FilterSpec) -> pd.DataFrame:
+        """Run a spec and report the plan with estimated and actual row counts and time per step.
+
+        estimated_rows is the step's own load-time estimate and
+        estimated_remaining scales it by the earlier steps assuming independent
+        predicates; actual_rows is what was left after the step ran. Steps
+        skipped after the selection became empty are listed with no timing.
+        """
+        trace: List[Dict] = []
+        self.execute(spec, trace)
+        steps = self.plan(spec)
+        remaining = float(self.n_rows)
+        records = []
+        for i, step in enumerate(steps):
+            remaining *= step.estimated_rows / self.n_rows if self.n_rows else 0.0
+            record = trace[i] if i < len(trace) else {
+                'kind': step.kind, 'column': step.column, 'predicate': step.predicate,
+                'estimated_rows': step.estimated_rows, 'actual_rows': None, 'time_ms': None
+            }
+            records.append(dict(record, step=i, estimated_remaining=int(round(remaining))))
+        return pd.DataFrame(records, columns=[
+            'step', 'kind', 'column', 'predicate', 'estimated_rows',
+            'estimated_remaining', 'actual_rows', 'time_ms'
+        ])
+
+    def _candidates(self, step: PlanStep) -> np.ndarray:
+        """Get the rows matching the first, most selective predicate."""
+        if step.kind == 'range':
+            return self.sorted_indexes[step.column].rows(step.predicate[0], step.predicate[1])
+        packed = self.bitmap_index.match_any(step.column, step.predicate)
+        return np.flatnonzero(self.bitmap_index.to_mask(packed))
+
+    def _refine(self, step: PlanStep, rows: np.ndarray) -> np.ndarray:
+        """Keep the candidate rows that also match a later predicate."""
+        if step.kind == 'range':
+            values = self.range_values[step.column][rows]
+            return rows[(values >= step.predicate[0]) & (values <= step.predicate[1])]
+        packed = self.bitmap_index.match_any(step.column, step.predicate)
+        return rows[self.bitmap_index.contains(packed, rows)]
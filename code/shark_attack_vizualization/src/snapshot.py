@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Bump whenever the set or meaning of the derived columns changes so that
+# snapshots written by older code are rebuilt instead of being reused.
+SNAPSHOT_VERSION = 6
+
+META_FILE = 'meta.json'
+
+
+def source_fingerprint(paths: List[str]) -> str:
+    """Hash the source files together with the snapshot version."""
+    digest = hashlib.sha256(f'v{SNAPSHOT_VERSION}'.encode())
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_version(fingerprint: str, settings: Optional[Dict] = None) -> str:
+    """Short digest of a source fingerprint and the derived-column settings, changing whenever either does."""
+    payload = fingerprint + json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _source_stats(paths: List[str]) -> List[Dict]:
+    """Collect size and mtime of the source files for a cheap validity check."""
+    return [
+        {'path': os.path.basename(path),
+         'size': os.path.getsize(path),
+         'mtime_ns': os.stat(path).st_mtime_ns}
+        for path in paths
+    ]
+
+
+def _column_file(index: int) -> str:
+    return f'col_{index:03d}.npy'
+
+
+def _save_column(directory: str, index: int, series: pd.Series) -> Dict:
+    """Write one column as .npy and return the metadata needed to restore it."""
+    entry = {'name': series.name, 'file': _column_file(index)}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        entry['kind'] = 'categorical'
+        entry['categories'] = series.cat.categories.tolist()
+        values = series.cat.codes.to_numpy()
+    elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+        entry['kind'] = 'array'
+        values = series.to_numpy()
+    else:
+        # Strings are stored as integer codes plus a category list so that the
+        # files never need pickling.
+        categorical = pd.Categorical(series)
+        entry['kind'] = 'object'
+        entry['categories'] = categorical.categories.tolist()
+        values = categorical.codes
+    np.save(os.path.join(directory, entry['file']), values, allow_pickle=False)
+    return entry
+
+
+def _load_column(directory: str, entry: Dict) -> pd.Series:
+    """Restore one column written by _save_column."""
+    values = np.load(os.path.join(directory, entry['file']), allow_pickle=False)
+    if entry['kind'] == 'array':
+        return pd.Series(values, name=entry['name'])
+    categorical = pd.Categorical.from_codes(values, categories=entry['categories'])
+    if entry['kind'] == 'categorical':
+        return pd.Series(categorical, name=entry['name'])
+    return pd.Series(categorical, name=entry['name']).astype(object)
+
+
+def _normalize_settings(settings: Optional[Dict]) -> Optional[Dict]:
+    """Round-trip settings through JSON so tuples compare equal to the stored lists."""
+    return json.loads(json.dumps(settings)) if settings is not None else None
+
+
+def _refresh_source_stats(meta_path: str, meta: Dict, stats: List[Dict]):
+    """Rewrite the snapshot metadata with the current source stats, if the directory is writable."""
+    staging = f'{meta_path}.tmp{os.getpid()}'
+    try:
+        with open(staging, 'w') as f:
+            json.dump(dict(meta, sources=stats), f)
+        os.replace(staging, meta_path)
+    except OSError:
+        # Read-only data directory: later starts keep hashing
+        pass
+
+
+def load_snapshot(directory: str, paths: List[str],
+                  settings: Optional[Dict] = None) -> Optional[Tuple[pd.DataFrame, Dict, str]]:
+    """Load the snapshot for the given sources and settings, or None if it is missing or stale.
+
+    Returns the frame, the state centroids and the source fingerprint the
+    snapshot was built from.
+    """
+    meta_path = os.path.join(directory, META_FILE)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('version') != SNAPSHOT_VERSION:
+            return None
+        if meta.get('settings') != _normalize_settings(settings):
+            return None
+        # Sizes and mtimes match for an untouched file; only hash when they do not.
+        stats = _source_stats(paths)
+        if meta.get('sources') != stats:
+            if meta.get('fingerprint') != source_fingerprint(paths):
+                return None
+            # Same content with new mtimes (e.g. a fresh checkout): record them so
+            # later starts can skip the hash again
+            _refresh_source_stats(meta_path, meta, stats)
+        df = pd.concat([_load_column(directory, entry) for entry in meta['columns']], axis=1)
+        return df, meta['state_centroids'], meta['fingerprint']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_snapshot(directory: str, paths: List[str], df: pd.DataFrame, state_centroids: Dict,
+                  settings: Optional[Dict] = None, fingerprint: Optional[str] = None):
+    """Write the derived frame and centroids next to the source data, hashing the sources unless given their fingerprint."""
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.snapshot-', dir=parent)
+    try:
+        columns = [_save_column(staging, i, df[name]) for i, name in enumerate(df.columns)]
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'fingerprint': fingerprint or source_fingerprint(paths),
+            'sources': _source_stats(paths),
+            'settings': _normalize_settings(settings),
+            'columns': columns,
+            'state_centroids': state_centroids
+        }
+        with open(os.path.join(staging, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        # Swap the finished directory in so concurrent workers never see a half-written snapshot.
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+    finally:
+        if os.path.isdir(staging):
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,27 @@
+import numpy as np
+from typing import Tuple
+
+
+class SortedIndex:
+    def __init__(self, values: np.ndarray):
+        """Presort a numeric column, keeping the permutation back to row positions."""
+        index_dtype = np.int32 if len(values) < np.iinfo(np.int32).max else np.int64
+        self.order = np.argsort(values, kind='stable').astype(index_dtype)
+        # NaN sorts last, so it never falls inside a searched range
+        self.sorted_values = values[self.order]
+
+    def bounds(self, low, high) -> Tuple[int, int]:
+        """Get the slice of the sorted order holding values in [low, high]."""
+        start = int(np.searchsorted(self.sorted_values, low, side='left'))
+        stop = int(np.searchsorted(self.sorted_values, high, side='right'))
+        return start, max(start, stop)
+
+    def count(self, low, high) -> int:
+        """Count the rows with values in [low, high]."""
+        start, stop = self.bounds(low, high)
+        return stop - start
+
+    def rows(self, low, high) -> np.ndarray:
+        """Get the positions of the rows with values in [low, high], in value order."""
+        start, stop = self.bounds(low, high)
+        return self.order[start:stop]
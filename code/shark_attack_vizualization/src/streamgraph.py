@@ -0,0 +1,48 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List
+
+STREAM_BASELINES = ('symmetric', 'wiggle')
+
+
+@dataclass(frozen=True)
+class StreamLayout:
+    """Stacked layers of a streamgraph: one row per year, one column per species."""
+    years: np.ndarray
+    species: List[str]
+    counts: np.ndarray
+    baseline: np.ndarray
+    tops: np.ndarray
+
+
+def stream_layout(years: np.ndarray, species: List[str], counts: np.ndarray,
+                  top_n: int, baseline: str = 'symmetric') -> StreamLayout:
+    """Stack the top_n species of a year x species count matrix around a baseline.
+
+    Species are ranked by total count (ties keep label order) and stacked
+    alphabetically; years where none of them occur are dropped. 'symmetric'
+    centres each year on zero, 'wiggle' uses the baseline minimising the
+    squared slope of the layers (Byron & Wattenberg), which for unweighted
+    layers is -sum((n - i) * f_i) / (n + 1) over layers i = 0..n-1.
+    """
+    if baseline not in STREAM_BASELINES:
+        raise ValueError(f"Unknown streamgraph baseline '{baseline}', expected one of {STREAM_BASELINES}")
+
+    totals = counts.sum(axis=0)
+    ranked = np.argsort(-totals, kind='stable')[:top_n]
+    ranked = ranked[totals[ranked] > 0]
+    names = np.asarray(species, dtype=object)[ranked].astype(str)
+    order = np.argsort(names, kind='stable')
+    names, columns = names[order], ranked[order]
+
+    layers = counts[:, columns].astype(float)
+    present = layers.sum(axis=1) > 0
+    layers, years = layers[present], np.asarray(years)[present]
+
+    n = layers.shape[1]
+    if baseline == 'symmetric':
+        offset = -layers.sum(axis=1) / 2
+    else:
+        offset = -(layers @ (n - np.arange(n))) / (n + 1)
+    tops = offset[:, None] + np.cumsum(layers, axis=1)
+    return StreamLayout(years, names.tolist(), layers, offset, tops)
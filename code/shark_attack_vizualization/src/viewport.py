@@ -0,0 +1,90 @@
+import numpy as np
+from typing import Dict, Sequence, Tuple
+
+# Width in pixels of the whole world at zoom 0 in the Mapbox GL projection used by the map
+MAPBOX_TILE_PX = 512
+
+Bounds = Tuple[float, float, float, float]  # lon_min, lat_min, lon_max, lat_max
+
+
+def visible_bounds(camera_position: Dict, viewport_px: Sequence[int]) -> Bounds:
+    """Get the visible area of the map camera.
+
+    Uses the corner coordinates reported by the browser when the camera
+    carries them, otherwise estimates them from the centre and zoom for a
+    viewport of the given pixel size.
+    """
+    corners = camera_position.get('bounds')
+    if corners:
+        lons, lats = zip(*corners)
+        return min(lons), min(lats), max(lons), max(lats)
+
+    world = MAPBOX_TILE_PX * 2 ** camera_position['zoom']
+    center = camera_position['center']
+    x = (center['lon'] + 180.0) / 360.0 * world
+    sin_lat = np.sin(np.radians(np.clip(center['lat'], -85.0511, 85.0511)))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * world
+    half_width, half_height = viewport_px[0] / 2, viewport_px[1] / 2
+
+    def lat_at(pixel_y):
+        return float(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * pixel_y / world)))))
+
+    lon_min = max((x - half_width) / world * 360.0 - 180.0, -180.0)
+    lon_max = min((x + half_width) / world * 360.0 - 180.0, 180.0)
+    return lon_min, lat_at(min(y + half_height, world)), lon_max, lat_at(max(y - half_height, 0))
+
+
+def expand_bounds(bounds: Bounds, margin: float) -> Bounds:
+    """Grow bounds on every side by a fraction of their width and height."""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    d_lon, d_lat = (lon_max - lon_min) * margin, (lat_max - lat_min) * margin
+    return (max(lon_min - d_lon, -180.0), max(lat_min - d_lat, -90.0),
+            min(lon_max + d_lon, 180.0), min(lat_max + d_lat, 90.0))
+
+
+def contains_bounds(outer: Sequence[float], inner: Sequence[float]) -> bool:
+    """Check whether inner lies entirely within outer."""
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and
+            inner[2] <= outer[2] and inner[3] <= outer[3])
+
+
+def in_bounds(lon: np.ndarray, lat: np.ndarray, bounds: Bounds) -> np.ndarray:
+    """Flag the points inside bounds; missing coordinates are never inside."""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    return (lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+
+
+def stratified_sample(rows: np.ndarray, lon: np.ndarray, lat: np.ndarray,
+                      bounds: Bounds, budget: int, grid: int) -> np.ndarray:
+    """Deterministically keep at most budget rows, spread evenly over a grid x grid split of bounds.
+
+    Every cell keeps up to the same number of rows, chosen as large as the
+    budget allows, so sparse areas keep all their points while dense ones are
+    thinned. Within a cell, rows are taken in the order of a fixed hash of
+    their position, so the same view always shows the same points.
+    """
+    if len(rows) <= budget:
+        return rows
+    # No more cells than the budget, so every occupied cell keeps at least one row
+    grid = max(1, min(grid, int(np.sqrt(budget))))
+    lon_min, lat_min, lon_max, lat_max = bounds
+    cx = np.clip(((lon - lon_min) / max(lon_max - lon_min, 1e-9) * grid).astype(np.int64), 0, grid - 1)
+    cy = np.clip(((lat - lat_min) / max(lat_max - lat_min, 1e-9) * grid).astype(np.int64), 0, grid - 1)
+    cells = cx * grid + cy
+
+    scrambled = (rows.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    order = np.lexsort((scrambled, cells))
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    rank = np.arange(len(order)) - np.repeat(starts, counts)
+
+    # Largest per-cell cap whose total stays within the budget
+    low, high = 0, int(counts.max())
+    while low < high:
+        cap = (low + high + 1) // 2
+        if np.minimum(counts, cap).sum() <= budget:
+            low = cap
+        else:
+            high = cap - 1
+    return np.sort(rows[order[rank < low]])
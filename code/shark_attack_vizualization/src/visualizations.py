@@ -1,18 +1,140 @@
+import functools
+import hashlib
+import json
+import os
+import plotly
 import plotly.graph_objects as go
 import plotly.express as px
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from dash import Patch
+from dataclasses import fields
+from typing import Callable, Dict, List, Optional, Tuple
 from config import (
     STATE_COLORS,
     MAP_SETTINGS,
     CHART_SETTINGS,
-    LAYOUT_SETTINGS
+    LAYOUT_SETTINGS,
+    DATA_SETTINGS,
+    DATA_PATHS,
+    HOVER_FIELDS,
+    HOVER_TEMPLATE
 )
+from figure_cache import FigureCache, figure_key
+from filter_spec import FilterSpec, resolve_spec
+from viewport import Bounds, contains_bounds, expand_bounds, visible_bounds
+
+# Modules whose code draws the charts or computes the series they show
+FIGURE_SOURCE_MODULES = ['visualizations', 'data', 'aggregation', 'count_cube', 'streamgraph']
+
+
+def figure_code_digest() -> str:
+    """Digest of the chart code and the settings the charts are drawn with.
+
+    It is part of the figure cache version, so a deploy that changes either
+    stops serving the figures cached on disk by the previous code.
+    """
+    digest = hashlib.sha256()
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in FIGURE_SOURCE_MODULES:
+        with open(os.path.join(source_dir, f'{name}.py'), 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps(
+        [plotly.__version__, STATE_COLORS, CHART_SETTINGS, LAYOUT_SETTINGS, DATA_SETTINGS],
+        sort_keys=True, default=repr
+    ).encode())
+    return digest.hexdigest()[:16]
+
+
+FIGURE_CODE_DIGEST = figure_code_digest()
+
+FILTER_ARGUMENTS = [field.name for field in fields(FilterSpec)]
+
+
+def cached_figure(chart_id: str) -> Callable:
+    """Serve a chart method from the figure cache, keyed by chart id, normalised filters and its other arguments.
+
+    The decorated method is called with the resolved FilterSpec; callers may
+    pass either a spec or the filter_data keyword arguments.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, spec: Optional[FilterSpec] = None, **kwargs) -> go.Figure:
+            filters = {name: kwargs.pop(name) for name in FILTER_ARGUMENTS if name in kwargs}
+            spec = resolve_spec(spec, filters)
+            self.figure_cache.set_version(f'{self.data_manager.dataset_version}-{FIGURE_CODE_DIGEST}')
+            key = figure_key(chart_id, spec, kwargs)
+            figure = self.figure_cache.get(key)
+            if figure is None:
+                figure = method(self, spec, **kwargs)
+                self.figure_cache.put(key, figure)
+            return figure
+        return wrapper
+    return decorator
+
 
 class DashboardVisualizer:
     def __init__(self, data_manager):
         """Initialize visualizer with data manager."""
         self.data_manager = data_manager
+        self.figure_cache = FigureCache(DATA_SETTINGS['figure_cache_size'], DATA_PATHS['figure_cache_dir'],
+                                        DATA_SETTINGS['figure_cache_disk_entries'])
+
+    def _hover_customdata(self, df: pd.DataFrame) -> np.ndarray:
+        """Build the per-point customdata consumed by HOVER_TEMPLATE."""
+        fields = df[HOVER_FIELDS].astype(object)
+        fields['Age'] = np.trunc(df['Age']).astype('Int64').astype(object)
+        fields['TimePeriod'] = df['TimePeriod'].str.title()
+        return fields.where(fields.notna(), 'Unknown').to_numpy()
+
+    def _point_size(self, zoom: float) -> float:
+        """Marker size of raw incident points, growing as the map zooms in."""
+        return max(6 * (1.1 ** (zoom - MAP_SETTINGS['default_zoom'])), 4)
+
+    def map_zoom_state(self, zoom: float, show_heatmap: bool) -> Tuple:
+        """Summarise everything in the map's data that depends on the zoom.
+
+        Two zooms with the same state draw the same traces, so moving between
+        them only needs the camera and the point size updated.
+        """
+        show_clusters = zoom < MAP_SETTINGS['cluster_max_zoom']
+        return (
+            self.data_manager.geojson_source(zoom) if self.data_manager.geojson_assets else None,
+            self.data_manager.cluster_index.level_for(zoom) if show_clusters else None,
+            self.data_manager.density_index.level_for(zoom) if show_heatmap else None
+        )
+
+    def map_points_bounds(self, camera_position: Dict) -> Bounds:
+        """Area whose incident points or heatmap bins are sent with the map: the visible area plus a margin."""
+        return expand_bounds(visible_bounds(camera_position, MAP_SETTINGS['viewport_px']),
+                             MAP_SETTINGS['viewport_margin'])
+
+    def map_culls_to_viewport(self, zoom: float, show_heatmap: bool) -> bool:
+        """Check whether the map only carries the data around the view: raw points or heatmap bins."""
+        return show_heatmap or zoom >= MAP_SETTINGS['cluster_max_zoom']
+
+    def can_patch_camera(self, previous_zoom: float, camera_position: Dict, show_heatmap: bool) -> bool:
+        """Check whether a camera move can keep the traces already sent to the browser."""
+        if (self.map_zoom_state(previous_zoom, show_heatmap) !=
+                self.map_zoom_state(camera_position['zoom'], show_heatmap)):
+            return False
+        if not self.map_culls_to_viewport(camera_position['zoom'], show_heatmap):
+            return True
+        # Points and heatmap bins were only sent for the area around the previous view
+        loaded = camera_position.get('loaded_bounds')
+        return loaded is not None and contains_bounds(
+            loaded, visible_bounds(camera_position, MAP_SETTINGS['viewport_px']))
+
+    def map_camera_patch(self, camera_position: Dict, show_heatmap: bool) -> Patch:
+        """Partial map update moving the camera without resending any trace data."""
+        patched = Patch()
+        patched['layout']['mapbox']['center'] = camera_position['center']
+        patched['layout']['mapbox']['zoom'] = camera_position['zoom']
+        if camera_position['zoom'] >= MAP_SETTINGS['cluster_max_zoom']:
+            # Raw points trace follows the choropleth, the hitboxes and the heatmap if shown
+            points_trace = 3 if show_heatmap else 2
+            patched['data'][points_trace]['marker']['size'] = self._point_size(camera_position['zoom'])
+        return patched
 
     def create_map(self, selected_injuries: Optional[List[str]] = None,
                    selected_states: Optional[List[str]] = None,
@@ -41,7 +163,7 @@ class DashboardVisualizer:
         fig = go.Figure()
 
         fig.add_trace(go.Choroplethmapbox(
-            geojson=self.data_manager.geojson_data,
+            geojson=self.data_manager.geojson_source(camera_position['zoom']),
             locations=[feat['properties']['STATE_NAME']
                        for feat in self.data_manager.geojson_data['features']],
             z=[1 if feat['properties']['STATE_NAME'] in selected_states else 0
@@ -70,25 +192,25 @@ class DashboardVisualizer:
             )
         ))
 
-        for feature in self.data_manager.geojson_data['features']:
-            state_name = feature['properties']['STATE_NAME']
-            if state_name in ['Tasmania', 'Victoria', 'Australian Capital Territory']:
-                centroid = self.data_manager.state_centroids[state_name]
-                fig.add_trace(go.Scattermapbox(
-                    lat=[centroid['lat']],
-                    lon=[centroid['lon']],
-                    mode='markers',
-                    marker=dict(
-                        size=20,  
-                        opacity=0, 
-                    ),
-                    name=state_name,
-                    hovertemplate=f"Click to select {state_name}<extra></extra>",
-                    showlegend=False,
-                    customdata=[state_name]
-                ))
-
-        filtered_df = self.data_manager.filter_data(
+        # Invisible click targets over states too small to hit reliably on the choropleth
+        hitbox_states = [feature['properties']['STATE_NAME']
+                         for feature in self.data_manager.geojson_data['features']
+                         if feature['properties']['STATE_NAME'] in ['Tasmania', 'Victoria', 'Australian Capital Territory']]
+        fig.add_trace(go.Scattermapbox(
+            lat=[self.data_manager.state_centroids[state]['lat'] for state in hitbox_states],
+            lon=[self.data_manager.state_centroids[state]['lon'] for state in hitbox_states],
+            mode='markers',
+            marker=dict(
+                size=20,
+                opacity=0,
+            ),
+            name='state-hitboxes',
+            hovertemplate="Click to select %{customdata[0]}<extra></extra>",
+            showlegend=False,
+            customdata=[[state] for state in hitbox_states]
+        ))
+
+        spec = FilterSpec.from_filters(
             selected_injuries=selected_injuries,
             selected_states=selected_states,
             age_range=age_range,
@@ -102,13 +224,17 @@ class DashboardVisualizer:
             selected_time_periods=selected_time_periods,
             selected_sharks=selected_sharks
         )
+        # Zoomed out, incidents are drawn as grid clusters instead of raw points
+        show_clusters = camera_position['zoom'] < MAP_SETTINGS['cluster_max_zoom']
 
         if show_heatmap:
-            valid_coords = filtered_df.dropna(subset=['Latitude', 'Longitude'])
+            # Incidents binned server-side; each bin is one point weighted by its count
+            density_bins = self.data_manager.get_density_bins(camera_position['zoom'], spec,
+                                                              self.map_points_bounds(camera_position))
             fig.add_densitymapbox(
-                lat=valid_coords['Latitude'],
-                lon=valid_coords['Longitude'],
-                z=valid_coords['Latitude'] * 0 + 1,  
+                lat=density_bins['Latitude'],
+                lon=density_bins['Longitude'],
+                z=density_bins['Count'],
                 radius=20,
                 colorscale=[
                     [0, 'rgba(0,0,255,0)'], 
@@ -122,75 +248,78 @@ class DashboardVisualizer:
                 hoverinfo='none',
                 showscale=False
             )
-        else:
-            for state in filtered_df['State'].unique():
-                if state in STATE_COLORS:
-                    state_data = filtered_df[
-                        (filtered_df['State'] == state) &
-                        filtered_df['Latitude'].notna() &
-                        filtered_df['Longitude'].notna()
-                        ]
-                    if not state_data.empty:
-                        fig.add_scattermapbox(
-                            lat=state_data['Latitude'],
-                            lon=state_data['Longitude'],
-                            mode='markers',
-                            marker=dict(
-                                size=max(6 * (1.1 ** (camera_position['zoom'] - MAP_SETTINGS['default_zoom'])), 4),
-                                color=STATE_COLORS[state],
-                                symbol='circle',
-                                opacity=0.8
-                            ),
-                            name=state,
-                            text=state_data['hover_text'],
-                            hoverinfo='text',
-                            hoverlabel=dict(
-                                bgcolor=CHART_SETTINGS['hover_bgcolor'],
-                                bordercolor=CHART_SETTINGS['hover_bordercolor'],
-                                font=dict(color=CHART_SETTINGS['font_color'], size=12)
-                            ),
-                            showlegend=False
-                        )
-
-        for state in filtered_df['State'].unique():
-            if state in STATE_COLORS:
-                state_data = filtered_df[filtered_df['State'] == state]
-                fig.add_scattermapbox(
-                    lat=state_data['Latitude'],
-                    lon=state_data['Longitude'],
-                    mode='markers',
-                    marker=dict(
-                        size=max(6 * (1.1 ** (camera_position['zoom'] - MAP_SETTINGS['default_zoom'])), 4),
-                        color=STATE_COLORS[state],
-                        symbol='circle',
-                        opacity=0.8
-                    ),
-                    name=state,
-                    text=state_data['hover_text'],
-                    hoverinfo='text',
-                    hoverlabel=dict(
-                        bgcolor=CHART_SETTINGS['hover_bgcolor'],
-                        bordercolor=CHART_SETTINGS['hover_bordercolor'],
-                        font=dict(color=CHART_SETTINGS['font_color'], size=12)
-                    ),
-                    showlegend=False
-                )
 
-        for state, centroid in self.data_manager.state_centroids.items():
+        if show_clusters:
+            clusters = self.data_manager.get_map_clusters(camera_position['zoom'], spec)
             fig.add_scattermapbox(
-                lat=[centroid['lat']],
-                lon=[centroid['lon']],
-                mode='text',
-                text=[state],
-                textfont=dict(
-                    size=14,  
-                    color=CHART_SETTINGS['font_color'],
-                    weight='bold'  
+                lat=clusters['Latitude'],
+                lon=clusters['Longitude'],
+                mode='markers+text',
+                marker=dict(
+                    size=np.minimum(8 + 3 * np.sqrt(clusters['Count']), 40),
+                    color=clusters['State'].map(STATE_COLORS).fillna('#808080').to_numpy(),
+                    opacity=0.7
+                ),
+                text=clusters['Count'].astype(str),
+                textfont=dict(color=CHART_SETTINGS['font_color'], size=11),
+                name='incident-clusters',
+                customdata=clusters[['Count', 'State', 'SharkName']].fillna('Unknown').to_numpy(),
+                hovertemplate=(
+                    "<b>%{customdata[0]} incidents</b><br>"
+                    "<b>Mostly in:</b> %{customdata[1]}<br>"
+                    "<b>Top species:</b> %{customdata[2]}"
+                    "<extra></extra>"
+                ),
+                hoverlabel=dict(
+                    bgcolor=CHART_SETTINGS['hover_bgcolor'],
+                    bordercolor=CHART_SETTINGS['hover_bordercolor'],
+                    font=dict(color=CHART_SETTINGS['font_color'], size=12)
+                ),
+                showlegend=False
+            )
+        else:
+            # One trace for every incident point, coloured per state
+            rows = self.data_manager.get_map_points(self.map_points_bounds(camera_position), spec)
+            filtered_df = self.data_manager.gather(rows, ['State', 'Latitude', 'Longitude'] + HOVER_FIELDS)
+            points = filtered_df[filtered_df['State'].isin(list(STATE_COLORS)) &
+                                 filtered_df['Latitude'].notna() &
+                                 filtered_df['Longitude'].notna()]
+            fig.add_scattermapbox(
+                lat=points['Latitude'],
+                lon=points['Longitude'],
+                mode='markers',
+                marker=dict(
+                    size=self._point_size(camera_position['zoom']),
+                    color=points['State'].astype(str).map(STATE_COLORS).to_numpy(),
+                    symbol='circle',
+                    opacity=0.8
+                ),
+                name='incidents',
+                customdata=self._hover_customdata(points),
+                hovertemplate=HOVER_TEMPLATE,
+                hoverlabel=dict(
+                    bgcolor=CHART_SETTINGS['hover_bgcolor'],
+                    bordercolor=CHART_SETTINGS['hover_bordercolor'],
+                    font=dict(color=CHART_SETTINGS['font_color'], size=12)
                 ),
-                hoverinfo='none',
                 showlegend=False
             )
 
+        state_labels = list(self.data_manager.state_centroids.items())
+        fig.add_scattermapbox(
+            lat=[centroid['lat'] for _, centroid in state_labels],
+            lon=[centroid['lon'] for _, centroid in state_labels],
+            mode='text',
+            text=[state for state, _ in state_labels],
+            textfont=dict(
+                size=14,
+                color=CHART_SETTINGS['font_color'],
+                weight='bold'
+            ),
+            hoverinfo='none',
+            showlegend=False
+        )
+
         fig.update_layout(
             margin={"r": 0, "t": 0, "l": 0, "b": 0},
             paper_bgcolor=CHART_SETTINGS['background_color'],
@@ -211,39 +340,16 @@ class DashboardVisualizer:
 
         return fig
 
-    def create_attacks_by_state(self, selected_injuries: Optional[List[str]] = None,
-                            selected_states: Optional[List[str]] = None,
-                            age_range: Optional[List[float]] = None,
-                            month_range: Optional[List[int]] = None,
-                            day_range: Optional[List[int]] = None,
-                            year_range: Optional[List[int]] = None,
-                            selected_days: Optional[List[str]] = None,
-                            selected_genders: Optional[List[str]] = None,
-                            selected_months: Optional[List[int]] = None,
-                            selected_activities: Optional[List[str]] = None,
-                            selected_time_periods: Optional[List[str]] = None,
-                            selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('attacks-by-state')
+    def create_attacks_by_state(self, spec: FilterSpec) -> go.Figure:
         """Create attacks by state bar chart with clickable bars."""
-        attacks_by_state = self.data_manager.get_attacks_by_state(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        attacks_by_state = self.data_manager.get_attacks_by_state(spec)
 
         total_attacks = attacks_by_state.sum()
         percentages = (attacks_by_state / total_attacks * 100).round(1)
 
         colors = [
-            STATE_COLORS.get(state, '#808080') if selected_states is None or state not in selected_states
+            STATE_COLORS.get(state, '#808080') if not spec.selected_states or state not in spec.selected_states
             else '#36def7'
             for state in percentages.index
         ]
@@ -271,36 +377,13 @@ class DashboardVisualizer:
             clickmode='event+select'
         )
         return fig
-    def create_activity_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                selected_states: Optional[List[str]] = None,
-                                age_range: Optional[List[float]] = None,
-                                month_range: Optional[List[int]] = None,
-                                day_range: Optional[List[int]] = None,
-                                year_range: Optional[List[int]] = None,
-                                selected_days: Optional[List[str]] = None,
-                                selected_genders: Optional[List[str]] = None,
-                                selected_months: Optional[List[int]] = None,
-                                selected_activities: Optional[List[str]] = None,
-                                selected_time_periods: Optional[List[str]] = None,
-                                selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('activity-distribution')
+    def create_activity_distribution(self, spec: FilterSpec) -> go.Figure:
         """Create activity distribution bar chart."""
-        top_activities = self.data_manager.get_activity_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        top_activities = self.data_manager.get_activity_distribution(spec)
 
         colors = [
-            '#36def7' if activity in (selected_activities or [])
+            '#36def7' if activity in (spec.selected_activities or ())
             else CHART_SETTINGS['accent_color']
             for activity in top_activities.index
         ]
@@ -333,33 +416,10 @@ class DashboardVisualizer:
             clickmode='event+select'
         )
         return fig
-    def create_shark_species(self, selected_injuries: Optional[List[str]] = None,
-                           selected_states: Optional[List[str]] = None,
-                           age_range: Optional[List[float]] = None,
-                           month_range: Optional[List[int]] = None,
-                           day_range: Optional[List[int]] = None,
-                           year_range: Optional[List[int]] = None,
-                           selected_days: Optional[List[str]] = None,
-                           selected_genders: Optional[List[str]] = None,
-                           selected_months: Optional[List[int]] = None,
-                           selected_activities: Optional[List[str]] = None,
-                           selected_time_periods: Optional[List[str]] = None,
-                           selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('shark-species')
+    def create_shark_species(self, spec: FilterSpec) -> go.Figure:
         """Create shark species distribution pie chart."""
-        top_sharks = self.data_manager.get_shark_species_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        top_sharks = self.data_manager.get_shark_species_distribution(spec)
         
         fig = go.Figure()
         fig.add_trace(go.Pie(
@@ -382,45 +442,14 @@ class DashboardVisualizer:
         )
         return fig
 
-    def create_hourly_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                   selected_states: Optional[List[str]] = None,
-                                   age_range: Optional[List[float]] = None,
-                                   month_range: Optional[List[int]] = None,
-                                   day_range: Optional[List[int]] = None,
-                                   year_range: Optional[List[int]] = None,
-                                   selected_days: Optional[List[str]] = None,
-                                   selected_genders: Optional[List[str]] = None,
-                                   selected_months: Optional[List[int]] = None,
-                                   selected_activities: Optional[List[str]] = None,
-                                   selected_time_periods: Optional[List[str]] = None,
-                                   selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('hourly-distribution')
+    def create_hourly_distribution(self, spec: FilterSpec) -> go.Figure:
         """Create hourly distribution bar chart with percentages."""
-        df_filtered = self.data_manager.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
-
-        hourly_counts = [0] * 24
+        bundle = self.data_manager.aggregate(spec)
 
-        for time_str in df_filtered['IncidentTime'].dropna():
-            try:
-                hour = int(time_str.split(':')[0])
-                if 0 <= hour < 24:
-                    hourly_counts[hour] += 1
-            except (ValueError, IndexError):
-                continue
+        hourly_counts = bundle.series('hour').reindex(range(24), fill_value=0).to_numpy()
 
-        total_attacks = sum(hourly_counts)
+        total_attacks = hourly_counts.sum()
         hourly_percentages = [(count / total_attacks * 100) if total_attacks > 0 else 0 for count in hourly_counts]
 
         hours = [f"{str(i).zfill(2)}:00" for i in range(24)]
@@ -453,33 +482,10 @@ class DashboardVisualizer:
         )
         return fig
 
-    def create_day_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                selected_states: Optional[List[str]] = None,
-                                age_range: Optional[List[float]] = None,
-                                month_range: Optional[List[int]] = None,
-                                day_range: Optional[List[int]] = None,
-                                year_range: Optional[List[int]] = None,
-                                selected_days: Optional[List[str]] = None,
-                                selected_genders: Optional[List[str]] = None,
-                                selected_months: Optional[List[int]] = None,
-                                selected_activities: Optional[List[str]] = None,
-                                selected_time_periods: Optional[List[str]] = None,
-                                selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('day-distribution')
+    def create_day_distribution(self, spec: FilterSpec) -> go.Figure:
         """Create day of week distribution bar chart."""
-        daily_dist = self.data_manager.get_day_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        daily_dist = self.data_manager.get_day_distribution(spec)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -509,33 +515,10 @@ class DashboardVisualizer:
         )
         return fig
 
-    def create_monthly_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                    selected_states: Optional[List[str]] = None,
-                                    age_range: Optional[List[float]] = None,
-                                    month_range: Optional[List[int]] = None,
-                                    day_range: Optional[List[int]] = None,
-                                    year_range: Optional[List[int]] = None,
-                                    selected_days: Optional[List[str]] = None,
-                                    selected_genders: Optional[List[str]] = None,
-                                    selected_months: Optional[List[int]] = None,
-                                    selected_activities: Optional[List[str]] = None,
-                                    selected_time_periods: Optional[List[str]] = None,
-                                    selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('monthly-distribution')
+    def create_monthly_distribution(self, spec: FilterSpec) -> go.Figure:
         """Create monthly distribution bar chart."""
-        monthly_dist = self.data_manager.get_monthly_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        monthly_dist = self.data_manager.get_monthly_distribution(spec)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -565,33 +548,10 @@ class DashboardVisualizer:
         )
         return fig
 
-    def create_age_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                selected_states: Optional[List[str]] = None,
-                                age_range: Optional[List[float]] = None,
-                                month_range: Optional[List[int]] = None,
-                                day_range: Optional[List[int]] = None,
-                                year_range: Optional[List[int]] = None,
-                                selected_days: Optional[List[str]] = None,
-                                selected_genders: Optional[List[str]] = None,
-                                selected_months: Optional[List[int]] = None,
-                                selected_activities: Optional[List[str]] = None,
-                                selected_time_periods: Optional[List[str]] = None,
-                                selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('age-distribution')
+    def create_age_distribution(self, spec: FilterSpec) -> go.Figure:
         """Create age distribution bar chart with percentages."""
-        age_dist = self.data_manager.get_age_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        age_dist = self.data_manager.get_age_distribution(spec)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -621,68 +581,34 @@ class DashboardVisualizer:
         )
         return fig
 
-    def create_shark_streamgraph(self, selected_injuries: Optional[List[str]] = None,
-                                 selected_states: Optional[List[str]] = None,
-                                 age_range: Optional[List[float]] = None,
-                                 year_range: Optional[List[int]] = None,
-                                 selected_days: Optional[List[str]] = None,
-                                 selected_genders: Optional[List[str]] = None,
-                                 selected_months: Optional[List[int]] = None,
-                                 selected_activities: Optional[List[str]] = None,
-                                 selected_time_periods: Optional[List[str]] = None,
-                                 selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('shark-streamgraph')
+    def create_shark_streamgraph(self, spec: FilterSpec, baseline: Optional[str] = None) -> go.Figure:
         """Create streamgraph of shark attacks over time by species."""
-        # Get filtered data
-        df_filtered = self.data_manager.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
-
-        yearly_species = df_filtered.groupby(['Year', 'SharkName']).size().reset_index(name='Attacks')
-
-        top_sharks = df_filtered['SharkName'].value_counts().nlargest(6).index
 
-        yearly_species = yearly_species[yearly_species['SharkName'].isin(top_sharks)]
+        layout = self.data_manager.get_stream_layout(spec, baseline or CHART_SETTINGS['streamgraph_baseline'])
 
-        pivot_data = yearly_species.pivot(index='Year', columns='SharkName', values='Attacks').fillna(0)
-
-        pivot_data['sum'] = pivot_data.sum(axis=1)
-        pivot_data['baseline'] = -pivot_data['sum'] / 2
-        y_offsets = pivot_data['baseline'].cumsum()
+        shark_colors = {
+            'white shark': '#004D40',
+            'tiger shark': '#1E88E5',
+            'bull shark': '#6C6509',
+            'whaler shark': '#826252',
+            'wobbegong': '#D81B60',
+            'bronze whaler shark': '#FFC107'
+        }
 
         fig = go.Figure()
-
-        y_cumulative = pivot_data['baseline']
-        for shark in pivot_data.columns[:-2]: 
-            shark_colors = {
-                'white shark': '#004D40',
-                'tiger shark': '#1E88E5',
-                'bull shark': '#6C6509',
-                'whaler shark': '#826252',
-                'wobbegong': '#D81B60',
-                'bronze whaler shark': '#FFC107'
-            }
-
+        for i, shark in enumerate(layout.species):
             fig.add_trace(go.Scatter(
-                x=pivot_data.index,
-                y=y_cumulative + pivot_data[shark],
+                x=layout.years,
+                y=layout.tops[:, i],
                 name=shark,
                 mode='lines',
                 fill='tonexty',
                 fillcolor=shark_colors.get(shark, '#808080'),
                 line=dict(width=0.5, color=shark_colors.get(shark, '#808080')),
                 hovertemplate="Attacks: %{customdata}<extra>%{fullData.name}</extra>",
-                customdata=[abs(value) for value in pivot_data[shark]],
+                customdata=np.abs(layout.counts[:, i]),
             ))
-            y_cumulative += pivot_data[shark]
 
         fig.update_layout(
             title='Shark Attacks by Species Over Time',
@@ -718,35 +644,13 @@ class DashboardVisualizer:
 
         return fig
 
-    def create_provocation_distribution(self, selected_injuries: Optional[List[str]] = None,
-                                        selected_states: Optional[List[str]] = None,
-                                        age_range: Optional[List[float]] = None,
-                                        month_range: Optional[List[int]] = None,
-                                        day_range: Optional[List[int]] = None,
-                                        year_range: Optional[List[int]] = None,
-                                        selected_days: Optional[List[str]] = None,
-                                        selected_genders: Optional[List[str]] = None,
-                                        selected_months: Optional[List[int]] = None,
-                                        selected_activities: Optional[List[str]] = None,
-                                        selected_time_periods: Optional[List[str]] = None,
-                                        selected_sharks: Optional[List[str]] = None) -> go.Figure:
+    @cached_figure('provocation-distribution')
+    def create_provocation_distribution(self, spec: FilterSpec) -> go.Figure:
         """Create grouped bar chart for activities and provocation."""
-        df_filtered = self.data_manager.filter_data(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        bundle = self.data_manager.aggregate(spec)
 
-        activity_provocation = df_filtered.groupby(['Activity', 'Provocation']).size().unstack(fill_value=0)
+        activity_provocation = bundle.frame('activity_provocation')
+        activity_provocation = activity_provocation[activity_provocation.sum(axis=1) > 0]
 
         activity_provocation['total'] = activity_provocation.sum(axis=1)
         top_10_activities = activity_provocation.nlargest(10, 'total')
@@ -796,27 +700,10 @@ class DashboardVisualizer:
 
         return fig
 
-    def create_population_pyramid(self, selected_injuries: Optional[List[str]] = None,
-                                  selected_states=None, age_range=None,
-                                  month_range=None, day_range=None, year_range=None,
-                                  selected_days=None, selected_genders=None,
-                                  selected_months=None, selected_activities=None,
-                                  selected_time_periods=None, selected_sharks=None):
+    @cached_figure('population-pyramid')
+    def create_population_pyramid(self, spec: FilterSpec) -> go.Figure:
         """Create population pyramid showing gender and provocation distribution by age."""
-        df_counts = self.data_manager.get_gender_age_provocation_distribution(
-            selected_injuries=selected_injuries,
-            selected_states=selected_states,
-            age_range=age_range,
-            month_range=month_range,
-            day_range=day_range,
-            year_range=year_range,
-            selected_days=selected_days,
-            selected_genders=selected_genders,
-            selected_months=selected_months,
-            selected_activities=selected_activities,
-            selected_time_periods=selected_time_periods,
-            selected_sharks=selected_sharks
-        )
+        df_counts = self.data_manager.get_gender_age_provocation_distribution(spec)
 
         fig = go.Figure()
 
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'src'))
+
+
+@pytest.fixture(scope='session')
+def data_manager():
+    """DataManager over the bundled incident file; data paths are relative to the project directory."""
+    os.chdir(PROJECT_DIR)
+    from data import DataManager
+    return DataManager()
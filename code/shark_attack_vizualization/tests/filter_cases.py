@@ -0,0 +1,77 @@
+"""Random filter selections and the plain pandas results the engines are checked against."""
+import random
+
+import pandas as pd
+
+from config import REVERSE_STATE_MAPPING, STATE_NAME_MAPPING
+
+N_CASES = 200
+
+
+def chained_filter(df, selected_states=None, age_range=None, month_range=None, day_range=None,
+                   year_range=None, selected_days=None, selected_genders=None, selected_months=None,
+                   selected_activities=None, selected_time_periods=None, selected_sharks=None,
+                   selected_injuries=None):
+    """The original filter_data: one boolean mask and intermediate frame per predicate."""
+    filtered = df.copy()
+    if selected_states:
+        codes = [REVERSE_STATE_MAPPING.get(state, state) for state in selected_states
+                 if state in REVERSE_STATE_MAPPING or state in STATE_NAME_MAPPING]
+        filtered = filtered[filtered['State'].isin(codes)]
+    for column, bounds in [('Age', age_range), ('Month', month_range), ('Day', day_range), ('Year', year_range)]:
+        if bounds:
+            filtered = filtered[(filtered[column] >= bounds[0]) & (filtered[column] <= bounds[1])]
+    for column, values in [('DayOfWeek', selected_days), ('Gender', selected_genders),
+                           ('Month', selected_months), ('Activity', selected_activities),
+                           ('TimePeriod', selected_time_periods), ('SharkName', selected_sharks)]:
+        if values:
+            filtered = filtered[filtered[column].isin(values)]
+    if selected_injuries:
+        filtered = filtered[filtered['Injury'].str.lower().isin(selected_injuries)]
+    return filtered
+
+
+def random_filters(rng, df, ranges=True):
+    """Random filter_data keywords, including empty, unknown and unset selections."""
+    def pick(values):
+        if rng.random() > 0.4:
+            return rng.choice([None, []])
+        values = list(values)
+        return rng.sample(values, rng.randint(0, min(4, len(values))))
+
+    def pick_range(low, high):
+        if not ranges or rng.random() > 0.4:
+            return None
+        start = rng.randint(low, high)
+        return [start, rng.randint(start, high)]
+
+    return dict(
+        selected_states=pick(list(STATE_NAME_MAPPING) + list(REVERSE_STATE_MAPPING) + ['XX']),
+        age_range=pick_range(0, 90),
+        month_range=pick_range(1, 12),
+        day_range=pick_range(1, 31),
+        year_range=pick_range(1790, 2024),
+        selected_days=pick(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']),
+        selected_genders=pick(['male', 'female', 'unknown']),
+        selected_months=pick(range(1, 13)),
+        selected_activities=pick(df['Activity'].dropna().unique()),
+        selected_time_periods=pick(['morning', 'afternoon', 'evening', 'night']),
+        selected_sharks=pick(df['SharkName'].dropna().unique()),
+        selected_injuries=pick(['fatal', 'injured', 'uninjured'])
+    )
+
+
+def filter_cases(df, seed, ranges=True):
+    """N_CASES random filter_data keyword sets, the same ones for the same seed."""
+    rng = random.Random(seed)
+    return [random_filters(rng, df, ranges) for _ in range(N_CASES)]
+
+
+def expected_counts(frame, dimensions, labels):
+    """Count a frame per combination of dimensions with value_counts/groupby, shaped like the bundle."""
+    if len(dimensions) == 1:
+        column, = dimensions
+        return frame[column].value_counts().reindex(labels[column], fill_value=0).to_numpy()
+    index = pd.MultiIndex.from_product([labels[column] for column in dimensions])
+    counts = frame.groupby(dimensions, observed=True).size().reindex(index, fill_value=0)
+    return counts.to_numpy().reshape([len(labels[column]) for column in dimensions])
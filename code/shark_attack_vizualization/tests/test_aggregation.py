@@ -0,0 +1,22 @@
+"""Every aggregation series must match value_counts/groupby over the chained pandas filter."""
+import numpy as np
+
+from filter_cases import chained_filter, expected_counts, filter_cases
+
+
+def test_aggregate_matches_value_counts(data_manager):
+    df = data_manager.df
+    saved = data_manager.count_cube
+    # Without the cube every series is counted over the selected rows
+    data_manager.count_cube = None
+    try:
+        for filters in filter_cases(df, 3):
+            data_manager.bundle_cache.clear()
+            bundle = data_manager.aggregate(**filters)
+            frame = chained_filter(df, **filters)
+            for name, dimensions in bundle.dimensions.items():
+                np.testing.assert_array_equal(bundle.counts[name], expected_counts(frame, dimensions, bundle.labels),
+                                              err_msg=f'{name} {filters}')
+    finally:
+        data_manager.count_cube = saved
+        data_manager.bundle_cache.clear()
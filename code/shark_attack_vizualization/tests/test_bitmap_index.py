@@ -0,0 +1,25 @@
+"""The bitmap index and filter_data must select exactly the rows the chained pandas filter does."""
+import numpy as np
+import pandas as pd
+
+from filter_cases import chained_filter, filter_cases
+from filter_spec import FilterSpec
+
+
+def test_bitmap_index_matches_isin(data_manager):
+    df = data_manager.df
+    for filters in filter_cases(df, 0, ranges=False):
+        predicates = FilterSpec.from_filters(**filters).value_predicates()
+        packed = data_manager.bitmap_index.match_all(predicates)
+        expected = np.ones(len(df), dtype=bool)
+        for column, values in predicates.items():
+            expected &= df[column].isin(values).to_numpy()
+        got = np.ones(len(df), dtype=bool) if packed is None else data_manager.bitmap_index.to_mask(packed)
+        np.testing.assert_array_equal(got, expected, err_msg=str(filters))
+
+
+def test_filter_data_matches_chained_filter(data_manager):
+    for filters in filter_cases(data_manager.df, 1):
+        expected = chained_filter(data_manager.df, **filters)
+        got = data_manager.filter_data(**filters)
+        pd.testing.assert_frame_equal(got, expected, obj=str(filters))
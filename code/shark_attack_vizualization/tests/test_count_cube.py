@@ -0,0 +1,99 @@
+"""Aggregations summed from the count cube must match counting the selected rows."""
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import DATA_SETTINGS
+from count_cube import CountCube
+from filter_cases import chained_filter, expected_counts, filter_cases
+from filter_spec import FilterSpec
+
+# Values the dashboard's age and year sliders start at
+DEFAULT_SLIDERS = dict(age_range=[0, 90], year_range=[1900, 2024])
+
+
+@pytest.fixture(scope='module')
+def replicated_manager(data_manager):
+    """DataManager over the bundled incidents repeated until the cube is small enough to be kept."""
+    manager = copy.copy(data_manager)
+    manager.df = pd.concat([data_manager.df] * 8, ignore_index=True)
+    manager._build_indexes()
+    return manager
+
+
+@pytest.fixture
+def cube_calls(monkeypatch):
+    """Count the calls of CountCube.count."""
+    calls = []
+    count = CountCube.count
+
+    def counting(self, *args):
+        calls.append(args)
+        return count(self, *args)
+
+    monkeypatch.setattr(CountCube, 'count', counting)
+    return calls
+
+
+def cube_series(manager):
+    return [name for name, dimensions in manager.aggregator.aggregations.items()
+            if all(column in manager.count_cube.labels for column in dimensions)]
+
+
+def test_cube_aggregate_matches_value_counts(data_manager):
+    df = data_manager.df
+    saved = data_manager.count_cube
+    # The bundled file is too small for the cube to be kept, so force it on to cover its path
+    data_manager.count_cube = CountCube(df, DATA_SETTINGS['cube_dimensions'])
+    try:
+        for filters in filter_cases(df, 5):
+            data_manager.bundle_cache.clear()
+            bundle = data_manager.aggregate(**filters)
+            frame = chained_filter(df, **filters)
+            for name, dimensions in bundle.dimensions.items():
+                np.testing.assert_array_equal(bundle.counts[name], expected_counts(frame, dimensions, bundle.labels),
+                                              err_msg=f'{name} {filters}')
+    finally:
+        data_manager.count_cube = saved
+        data_manager.bundle_cache.clear()
+
+
+@pytest.mark.parametrize('filters', [
+    DEFAULT_SLIDERS,
+    dict(DEFAULT_SLIDERS, selected_genders=['male']),
+    dict(DEFAULT_SLIDERS, selected_states=['NSW', 'Queensland'], selected_months=[1, 2, 12]),
+    dict(age_range=[13, 24], year_range=[1950, 2000])
+])
+def test_default_sliders_are_answered_from_the_cube(replicated_manager, cube_calls, filters):
+    manager = replicated_manager
+    assert manager.count_cube is not None
+    manager.bundle_cache.clear()
+    bundle = manager.aggregate(**filters)
+    assert len(cube_calls) == len(cube_series(manager))
+
+    frame = chained_filter(manager.df, **filters)
+    for name, dimensions in bundle.dimensions.items():
+        np.testing.assert_array_equal(bundle.counts[name], expected_counts(frame, dimensions, bundle.labels),
+                                      err_msg=name)
+
+
+@pytest.mark.parametrize('filters', [
+    # Splits the 0-12 and 35-44 age groups
+    dict(age_range=[10, 40]),
+    dict(DEFAULT_SLIDERS, selected_activities=['Swimming']),
+    dict(DEFAULT_SLIDERS, day_range=[1, 15])
+])
+def test_filters_outside_the_cube_count_rows(replicated_manager, cube_calls, filters):
+    replicated_manager.bundle_cache.clear()
+    replicated_manager.aggregate(**filters)
+    assert cube_calls == []
+
+
+def test_age_range_maps_to_whole_age_groups(replicated_manager):
+    filters, ranges = replicated_manager._cube_predicates(FilterSpec.from_filters(**DEFAULT_SLIDERS))
+    # Every group with a recorded age, but not rows without one
+    assert filters == {'AgeGroup': tuple(label for label in replicated_manager.count_cube.labels['AgeGroup']
+                                         if label != 'Unknown')}
+    assert ranges == {'Year': (1900, 2024)}
@@ -0,0 +1,80 @@
+"""A session's crossfilter must always hold the counts of its current selection, visiting only the rows that change."""
+import random
+
+import numpy as np
+import pytest
+
+from filter_cases import filter_cases
+from filter_spec import FilterSpec
+
+
+def assert_counts_match(data_manager, spec, counts):
+    expected = data_manager.aggregator.count(data_manager.select_rows(spec))
+    for name, values in counts.items():
+        np.testing.assert_array_equal(values, expected[name], err_msg=f'{name} {spec}')
+
+
+def test_moves_between_random_selections(data_manager):
+    crossfilter = data_manager.crossfilter_index.session()
+    for filters in filter_cases(data_manager.df, 6):
+        spec = FilterSpec.from_filters(**filters)
+        assert_counts_match(data_manager, spec, crossfilter.move_to(spec))
+
+
+def test_single_toggles_from_the_default_sliders(data_manager):
+    rng = random.Random(7)
+    activities = list(data_manager.df['Activity'].dropna().unique())
+    filters = dict(age_range=[0, 90], year_range=[1900, 2024], selected_activities=[])
+    crossfilter = data_manager.crossfilter_index.session()
+    for _ in range(100):
+        field = rng.choice(['selected_activities', 'selected_genders', 'age_range', 'year_range'])
+        if field == 'selected_activities':
+            activity = rng.choice(activities)
+            chosen = filters.get(field) or []
+            filters[field] = [a for a in chosen if a != activity] if activity in chosen else chosen + [activity]
+        elif field == 'selected_genders':
+            filters[field] = rng.sample(['male', 'female', 'unknown'], rng.randint(0, 2))
+        else:
+            low = rng.randint(*((0, 60) if field == 'age_range' else (1800, 2020)))
+            filters[field] = [low, low + rng.randint(0, 40)]
+        spec = FilterSpec.from_filters(**filters)
+        assert_counts_match(data_manager, spec, crossfilter.move_to(spec))
+
+
+def test_toggle_visits_only_the_rows_of_the_toggled_value(data_manager):
+    activity = data_manager.df['Activity'].value_counts().index[1]
+    crossfilter = data_manager.crossfilter_index.session()
+    first = FilterSpec.from_filters(selected_activities=[data_manager.df['Activity'].value_counts().index[0]],
+                                    year_range=[1900, 2024])
+    crossfilter.move_to(first)
+    visited = crossfilter.rows_visited
+    crossfilter.move_to(FilterSpec.from_filters(selected_activities=list(first.selected_activities) + [activity],
+                                                year_range=[1900, 2024]))
+    assert crossfilter.rows_visited - visited == (data_manager.df['Activity'] == activity).sum()
+
+
+def test_sessions_keep_their_own_state(data_manager):
+    male = FilterSpec.from_filters(selected_genders=['male'])
+    fatal = FilterSpec.from_filters(selected_injuries=['fatal'], age_range=[18, 24])
+    data_manager.bundle_cache.clear()
+    assert_counts_match(data_manager, male, data_manager.aggregate(male, session='a').counts)
+    data_manager.bundle_cache.clear()
+    assert_counts_match(data_manager, fatal, data_manager.aggregate(fatal, session='b').counts)
+    assert data_manager.crossfilter('a').spec == male
+    assert data_manager.crossfilter('b').spec == fatal
+    data_manager.bundle_cache.clear()
+
+
+@pytest.mark.parametrize('filters', [
+    dict(age_range=[0, 90], year_range=[1900, 2024]),
+    dict(selected_states=['Atlantis'], selected_genders=['male']),
+    dict(selected_months=[1, 2], month_range=[2, 6], day_range=[1, 10])
+])
+def test_session_aggregate_matches_stateless_aggregate(data_manager, filters):
+    data_manager.bundle_cache.clear()
+    stateless = data_manager.aggregate(**filters)
+    data_manager.bundle_cache.clear()
+    tracked = data_manager.aggregate(session='c', **filters)
+    for name in stateless.counts:
+        np.testing.assert_array_equal(tracked.counts[name], stateless.counts[name], err_msg=name)
+    data_manager.bundle_cache.clear()
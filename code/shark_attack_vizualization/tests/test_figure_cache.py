@@ -0,0 +1,114 @@
+"""The figure cache must be bounded, shared through its directory and invalidated with the version."""
+import os
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+from figure_cache import FigureCache, figure_key
+from filter_spec import FilterSpec
+
+
+def figure(value):
+    return go.Figure(go.Bar(x=['a'], y=[value]))
+
+
+def disk_files(directory, version):
+    return sorted(name for name in os.listdir(os.path.join(directory, version)) if name.endswith('.json'))
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = FigureCache(2)
+    cache.set_version('v1')
+    for key in 'abc':
+        if key == 'c':
+            assert cache.get('a') is not None
+        cache.put(key, figure(1))
+    assert cache.get('b') is None
+    assert cache.stats() == dict(memory_hits=1, disk_hits=0, misses=1, evictions=1, disk_evictions=0,
+                                 invalidations=0, size=2, max_size=2)
+
+
+def test_disk_tier_is_shared_between_workers(tmp_path):
+    writer = FigureCache(4, str(tmp_path), 10)
+    reader = FigureCache(4, str(tmp_path), 10)
+    for cache in (writer, reader):
+        cache.set_version('v1')
+    writer.put('key', figure(7))
+    assert reader.get('key').data[0].y == (7,)
+    assert reader.get('key') is not None
+    assert reader.stats()['disk_hits'] == 1 and reader.stats()['memory_hits'] == 1
+
+
+def test_new_version_drops_the_previous_figures(tmp_path):
+    cache = FigureCache(4, str(tmp_path), 10)
+    cache.set_version('v1')
+    cache.put('key', figure(1))
+    cache.set_version('v2')
+    assert cache.get('key') is None
+    assert not (tmp_path / 'v1').exists()
+    cache.put('key', figure(2))
+    assert sorted(os.listdir(tmp_path)) == ['v2']
+    assert cache.stats()['invalidations'] == 1
+    # Setting the same version again keeps everything
+    cache.set_version('v2')
+    assert cache.get('key').data[0].y == (2,)
+
+
+def test_disk_tier_keeps_the_most_recently_used_files(tmp_path):
+    cache = FigureCache(1, str(tmp_path), 4, disk_slack=0.5)
+    cache.set_version('v1')
+    for i in range(4):
+        cache.put(f'k{i}', figure(i))
+        time.sleep(0.01)
+    # Reading k0 from disk marks it as recently used
+    cache.clear()
+    assert cache.get('k0') is not None
+    # Two writes fit in the slack before the directory is trimmed back to the limit
+    cache.put('k4', figure(4))
+    cache.put('k5', figure(5))
+    assert len(disk_files(tmp_path, 'v1')) == 6
+    cache.put('k6', figure(6))
+    assert disk_files(tmp_path, 'v1') == ['k0.json', 'k4.json', 'k5.json', 'k6.json']
+    assert cache.stats()['disk_evictions'] == 3
+
+
+def test_unwritable_directory_keeps_the_memory_tier(tmp_path):
+    blocker = tmp_path / 'cache'
+    blocker.write_text('not a directory')
+    cache = FigureCache(2, str(blocker), 10)
+    cache.set_version('v1')
+    cache.put('key', figure(1))
+    assert cache.get('key') is not None
+
+
+def test_keys_follow_the_normalised_filters():
+    a = FilterSpec.from_filters(selected_states=['WA', 'New South Wales'])
+    b = FilterSpec.from_filters(selected_states=['NSW', 'Western Australia'])
+    assert figure_key('state', a, {}) == figure_key('state', b, {})
+    assert figure_key('state', a, {}) != figure_key('species', a, {})
+    assert figure_key('stream', a, {'baseline': 'wiggle'}) != figure_key('stream', a, {'baseline': 'symmetric'})
+
+
+@pytest.fixture
+def visualizer(data_manager, tmp_path):
+    from visualizations import DashboardVisualizer
+
+    visualizer = DashboardVisualizer(data_manager)
+    visualizer.figure_cache = FigureCache(8, str(tmp_path), 10)
+    return visualizer
+
+
+def test_charts_are_served_from_the_cache(visualizer):
+    first = visualizer.create_attacks_by_state(selected_genders=['male'])
+    again = visualizer.create_attacks_by_state(FilterSpec.from_filters(selected_genders=['male']))
+    assert again is first
+    assert visualizer.figure_cache.stats()['misses'] == 1
+
+
+def test_dataset_reload_invalidates_the_charts(visualizer, monkeypatch):
+    visualizer.create_day_distribution()
+    monkeypatch.setattr(visualizer.data_manager, 'dataset_version', 'reloaded')
+    visualizer.create_day_distribution()
+    stats = visualizer.figure_cache.stats()
+    assert stats['misses'] == 2 and stats['invalidations'] == 1
@@ -0,0 +1,60 @@
+"""Equivalent filter selections must normalise to one hashable FilterSpec; the selection LRU must stay bounded."""
+import numpy as np
+import pytest
+
+from filter_spec import FilterSpec, SelectionCache, resolve_spec
+
+
+def test_equivalent_selections_share_a_spec():
+    a = FilterSpec.from_filters(selected_states=['New South Wales', 'WA'], selected_genders=['male', 'female'],
+                                age_range=[0, 90], selected_activities=[])
+    b = FilterSpec.from_filters(selected_states=['WA', 'NSW', 'NSW'], selected_genders=('female', 'male'),
+                                age_range=(0, 90), selected_activities=None)
+    assert a == b and hash(a) == hash(b)
+    assert a.selected_states == ('NSW', 'WA')
+    assert a.selected_activities is None
+
+
+def test_empty_and_unset_filters_apply_nothing():
+    spec = FilterSpec.from_filters(selected_days=[], year_range=[], selected_sharks=None)
+    assert spec == FilterSpec()
+    assert spec.value_predicates() == {} and spec.range_predicates() == {}
+
+
+def test_unknown_states_match_no_rows(data_manager):
+    spec = FilterSpec.from_filters(selected_states=['Atlantis'])
+    assert spec.selected_states == ()
+    assert len(data_manager.select_rows(spec)) == 0
+
+
+def test_predicates_are_keyed_by_column():
+    spec = FilterSpec.from_filters(selected_months=[3, 1], month_range=[2, 5], selected_injuries=['fatal'])
+    assert spec.value_predicates() == {'Month': (1, 3), 'Injury': ('fatal',)}
+    assert spec.range_predicates() == {'Month': (2, 5)}
+    assert FilterSpec.from_filters(**spec.as_dict()) == spec
+
+
+def test_resolve_spec_prefers_the_given_spec():
+    spec = FilterSpec.from_filters(selected_genders=['male'])
+    assert resolve_spec(spec, {'selected_genders': ['female']}) is spec
+    assert resolve_spec(None, {'selected_genders': ['male']}) == spec
+
+
+def test_selection_cache_counts_and_evicts_least_recently_used():
+    cache = SelectionCache(2)
+    specs = [FilterSpec.from_filters(year_range=[year, 2024]) for year in (1900, 1950, 2000)]
+    cache.put(specs[0], np.arange(3))
+    cache.put(specs[1], np.arange(2))
+    assert cache.get(specs[0]) is not None
+    cache.put(specs[2], np.arange(1))
+    # specs[1] was the least recently used
+    assert cache.get(specs[1]) is None
+    assert cache.get(specs[2]) is not None
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 2, 'max_size': 2}
+
+
+def test_cached_selections_are_read_only(data_manager):
+    rows = data_manager.select_rows(FilterSpec.from_filters(selected_genders=['female']))
+    with pytest.raises(ValueError):
+        rows[0] = 0
+    assert data_manager.select_rows(FilterSpec.from_filters(selected_genders=['female'])) is rows
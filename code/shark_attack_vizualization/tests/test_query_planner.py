@@ -0,0 +1,28 @@
+"""The query planner must select exactly the rows the chained pandas filter does, in any predicate order."""
+import numpy as np
+
+from filter_cases import chained_filter, filter_cases
+from filter_spec import FilterSpec
+
+
+def test_planner_matches_chained_filter(data_manager):
+    df = data_manager.df
+    for filters in filter_cases(df, 2):
+        spec = FilterSpec.from_filters(**filters)
+        expected = df.index.get_indexer(chained_filter(df, **filters).index)
+        np.testing.assert_array_equal(data_manager.query_planner.execute(spec), expected, err_msg=str(filters))
+        # Steps after the selection became empty are skipped and have no actual count
+        actual = data_manager.query_planner.explain(spec)['actual_rows'].dropna()
+        if len(actual):
+            assert actual.iloc[-1] == len(expected)
+
+
+def test_plan_starts_with_the_most_selective_predicate(data_manager):
+    spec = FilterSpec.from_filters(selected_genders=['male'], year_range=[2020, 2024], age_range=[0, 90])
+    plan = data_manager.explain(spec)
+    assert list(plan['estimated_rows']) == sorted(plan['estimated_rows'])
+    assert plan['column'].iloc[0] == 'Year'
+    # Range estimates come from the sorted index and are exact
+    years = data_manager.df['Year']
+    assert plan['estimated_rows'].iloc[0] == years.between(2020, 2024).sum()
+    assert plan['actual_rows'].iloc[-1] == len(data_manager.select_rows(spec))
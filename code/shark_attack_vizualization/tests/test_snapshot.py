@@ -0,0 +1,70 @@
+"""The columnar snapshot must restore the frame exactly and only while its sources and settings are unchanged."""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import snapshot
+from snapshot import load_snapshot, save_snapshot, source_fingerprint
+
+SETTINGS = {'age_group_edges': [12, 17], 'coordinate_bounds': {'lat': (-55.0, -9.0)}}
+CENTROIDS = {'New South Wales': {'lat': -32.2, 'lon': 147.0}}
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = [tmp_path / 'incidents.csv', tmp_path / 'states.geojson']
+    paths[0].write_text('Year,State\n2000,NSW\n')
+    paths[1].write_text('{}')
+    return [str(path) for path in paths]
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, data_manager, sources):
+    directory = str(tmp_path / 'snapshot')
+    save_snapshot(directory, sources, data_manager.df, CENTROIDS, SETTINGS)
+    return directory
+
+
+def test_snapshot_round_trips_the_frame(data_manager, sources, snapshot_dir):
+    df, centroids, fingerprint = load_snapshot(snapshot_dir, sources, SETTINGS)
+    pd.testing.assert_frame_equal(df, data_manager.df)
+    assert centroids == CENTROIDS
+    assert fingerprint == source_fingerprint(sources)
+
+
+def test_changed_source_invalidates_the_snapshot(sources, snapshot_dir):
+    with open(sources[0], 'a') as f:
+        f.write('2001,WA\n')
+    assert load_snapshot(snapshot_dir, sources, SETTINGS) is None
+
+
+def test_changed_settings_invalidate_the_snapshot(sources, snapshot_dir):
+    assert load_snapshot(snapshot_dir, sources, dict(SETTINGS, age_group_edges=[12, 18])) is None
+    # Tuples and lists are the same setting once stored
+    assert load_snapshot(snapshot_dir, sources, dict(SETTINGS, age_group_edges=(12, 17))) is not None
+
+
+def test_other_snapshot_version_is_rebuilt(monkeypatch, sources, snapshot_dir):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_VERSION', snapshot.SNAPSHOT_VERSION + 1)
+    assert load_snapshot(snapshot_dir, sources, SETTINGS) is None
+
+
+def test_touched_source_is_hashed_once(monkeypatch, sources, snapshot_dir):
+    stat = os.stat(sources[0])
+    os.utime(sources[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    # Same content under a new mtime still matches the stored fingerprint
+    assert load_snapshot(snapshot_dir, sources, SETTINGS) is not None
+    with open(os.path.join(snapshot_dir, snapshot.META_FILE)) as f:
+        assert json.load(f)['sources'][0]['mtime_ns'] == stat.st_mtime_ns + 10 ** 9
+
+    def fail(paths):
+        raise AssertionError('sources hashed again')
+
+    monkeypatch.setattr(snapshot, 'source_fingerprint', fail)
+    assert load_snapshot(snapshot_dir, sources, SETTINGS) is not None
+
+
+def test_missing_snapshot_loads_nothing(tmp_path, sources):
+    assert load_snapshot(str(tmp_path / 'absent'), sources, SETTINGS) is None
@@ -0,0 +1,31 @@
+"""Range lookups on the presorted indexes must match a pandas between() on the column."""
+import random
+
+import numpy as np
+
+from config import DATA_SETTINGS
+from sorted_index import SortedIndex
+
+
+def test_sorted_index_matches_between(data_manager):
+    rng = random.Random(4)
+    for column in DATA_SETTINGS['range_dimensions']:
+        values = data_manager.df[column]
+        index = data_manager.sorted_indexes[column]
+        low_value, high_value = int(values.min()), int(values.max())
+        for _ in range(50):
+            low = rng.randint(low_value - 2, high_value + 2)
+            high = rng.randint(low - 3, high_value + 2)
+            expected = np.flatnonzero(values.between(low, high).to_numpy())
+            rows = index.rows(low, high)
+            np.testing.assert_array_equal(np.sort(rows), expected, err_msg=f'{column} [{low}, {high}]')
+            assert index.count(low, high) == len(expected)
+            # Rows come in value order
+            assert np.all(np.diff(values.to_numpy()[rows]) >= 0)
+
+
+def test_sorted_index_skips_missing_values():
+    index = SortedIndex(np.array([3.0, np.nan, 1.0, 2.0, np.nan], dtype=np.float32))
+    np.testing.assert_array_equal(index.rows(-np.inf, np.inf), [2, 3, 0])
+    assert index.count(2, 2) == 1
+    assert index.count(3, 1) == 0
@@ -0,0 +1,51 @@
+"""Viewport culling and point sampling for the map."""
+import numpy as np
+
+from config import MAP_SETTINGS
+from viewport import contains_bounds, expand_bounds, in_bounds, stratified_sample, visible_bounds
+
+
+def test_stratified_sample_is_bounded_and_deterministic():
+    rng = np.random.default_rng(0)
+    # A dense cluster next to sparse background points
+    lon = np.concatenate([rng.normal(151.2, 0.05, 5000), rng.uniform(140, 155, 200)])
+    lat = np.concatenate([rng.normal(-33.9, 0.05, 5000), rng.uniform(-40, -25, 200)])
+    rows = np.arange(len(lon)) * 3
+    bounds = (140.0, -40.0, 155.0, -25.0)
+    inside = in_bounds(lon, lat, bounds)
+    rows, lon, lat = rows[inside], lon[inside], lat[inside]
+
+    sample = stratified_sample(rows, lon, lat, bounds, 500, 16)
+    assert len(sample) <= 500
+    assert np.all(np.diff(sample) > 0)
+    assert np.isin(sample, rows).all()
+    np.testing.assert_array_equal(sample, stratified_sample(rows, lon, lat, bounds, 500, 16))
+    # Every occupied cell keeps at least one point, so sparse areas are never emptied
+    cells = (np.clip(((lon - 140) / 15 * 16).astype(int), 0, 15) * 16
+             + np.clip(((lat + 40) / 15 * 16).astype(int), 0, 15))
+    kept_cells = cells[np.isin(rows, sample)]
+    assert set(kept_cells) == set(cells)
+    # Under the budget nothing is dropped
+    np.testing.assert_array_equal(stratified_sample(rows, lon, lat, bounds, len(rows), 16), rows)
+
+
+def test_visible_bounds_prefers_reported_corners():
+    camera = {'center': {'lat': -33.9, 'lon': 151.2}, 'zoom': 10,
+              'bounds': [[150.9, -34.1], [151.5, -34.1], [151.5, -33.7], [150.9, -33.7]]}
+    assert visible_bounds(camera, MAP_SETTINGS['viewport_px']) == (150.9, -34.1, 151.5, -33.7)
+
+
+def test_estimated_bounds_shrink_with_zoom_and_contain_the_centre():
+    center = {'lat': -33.9, 'lon': 151.2}
+    wide = visible_bounds({'center': center, 'zoom': 6}, MAP_SETTINGS['viewport_px'])
+    close = visible_bounds({'center': center, 'zoom': 10}, MAP_SETTINGS['viewport_px'])
+    assert contains_bounds(wide, close)
+    assert close[0] < center['lon'] < close[2] and close[1] < center['lat'] < close[3]
+    grown = expand_bounds(close, MAP_SETTINGS['viewport_margin'])
+    assert contains_bounds(grown, close) and not contains_bounds(close, grown)
+
+
+def test_in_bounds_never_keeps_missing_coordinates():
+    lon = np.array([151.0, np.nan, 151.0, 160.0])
+    lat = np.array([-34.0, -34.0, np.nan, -34.0])
+    np.testing.assert_array_equal(in_bounds(lon, lat, (150.0, -35.0, 152.0, -33.0)), [True, False, False, False])